@@ -1,7 +1,7 @@
 # ----------------------------------------------------------------------------------------------------------
 # Wouter Gilsing
 # woutergilsing@hotmail.com
-version = "1.9"
+version = "1.10"
 releaseDate = "March 28 2021"
 
 
@@ -20,27 +20,111 @@ import os
 import subprocess
 import platform
 
+import bisect
 import traceback
 import colorsys
 
+from collections import OrderedDict
+
 import W_hotboxManager
+import W_hotboxCatalog
+import W_hotboxCache
+import W_hotboxLayout
+import W_hotboxRules
+import W_hotboxPack
+import W_hotboxMirror
+import W_hotboxLoader
+import W_hotboxPrefetch
+import W_hotboxTrace
+import W_hotboxTelemetry
+import W_hotboxProfile
+import W_hotboxMemory
 
 preferencesNode = nuke.toNode("preferences")
 operatingSystem = platform.system()
 
+# folder inside a repository storing the compiled scripts of its buttons
+bytecodeFolderName = "_bytecode"
+
+
+class LaunchContext(object):
+    """
+    Snapshot of the selection at the moment the hotbox gets launched. Querying the selection means
+    walking the node graph, so it's done once per launch and shared by every part of the hotbox.
+    """
+
+    def __init__(self):
+        self.selection = nuke.selectedNodes()
+
+        self.classes = list(set([node.Class() for node in self.selection]))
+
+        # check whether selection in group
+        self.groupRoot = "root"
+
+        if self.selection:
+            nodeRoot = self.selection[0].fullName()
+            if nodeRoot.count("."):
+                self.groupRoot = ".".join([self.groupRoot] + nodeRoot.split(".")[:-1])
+
+        # names of the selected group nodes, without their trailing digits
+        self.groupNames = []
+
+        if "Group" in self.classes:
+            for node in self.selection:
+                if node.Class() == "Group":
+                    groupName = node.name().rstrip("0123456789")
+                    if groupName not in self.groupNames and groupName != "Group":
+                        self.groupNames.append(groupName)
+
+        self._node = None
+        self._tileColor = None
+
+    def node(self):
+        """
+        Return the currently selected node, or None if nothing is selected.
+        """
+
+        if self._node is None and self.selection:
+            self._node = nuke.selectedNode()
+
+        return self._node
+
+    def tileColor(self):
+        """
+        Return the tile color of the currently selected node.
+        """
+
+        if self._tileColor is None:
+            self._tileColor = getTileColor(self.node())
+
+        return self._tileColor
+
 
 class Hotbox(QtWidgets.QWidget):
     """
     The main class for the hotbox
     """
 
-    def __init__(self, subMenuMode=False, path="", name="", position=""):
+    def __init__(
+        self,
+        subMenuMode=False,
+        path="",
+        name="",
+        position="",
+        context=None,
+        populate=True,
+    ):
         super(Hotbox, self).__init__()
 
-        self.active = True
+        self.active = False
         self.activeButton = None
 
-        self.triggerMode = preferencesNode.knob("hotboxTriggerDropdown").getValue()
+        self.configuration = None
+        self.revision = None
+        self.buttons = []
+
+        # whether the next paint is the first one after the hotbox was placed, only used when tracing
+        self.paintPending = False
 
         self.setWindowFlags(
             QtCore.Qt.FramelessWindowHint | QtCore.Qt.WindowStaysOnTopHint
@@ -56,52 +140,33 @@ class Hotbox(QtWidgets.QWidget):
         ):
             self.setAttribute(QtCore.Qt.WA_PaintOnScreen)
 
-        masterLayout = QtWidgets.QVBoxLayout()
-        self.setLayout(masterLayout)
+        self.masterLayout = QtWidgets.QVBoxLayout()
+        self.setLayout(self.masterLayout)
 
-        # - context
-        self.selection = nuke.selectedNodes()
+        # make sure the widgets closes when it loses focus
+        self.installEventFilter(self)
 
-        # check whether selection in group
-        self.groupRoot = "root"
+        if populate:
+            self.populate(subMenuMode, path, name, position, context)
 
-        if self.selection:
-            nodeRoot = self.selection[0].fullName()
-            if nodeRoot.count("."):
-                self.groupRoot = ".".join([self.groupRoot] + nodeRoot.split(".")[:-1])
+    @staticmethod
+    def resolve(subMenuMode=False, path="", context=None):
+        """
+        Find out which items the hotbox is going to show, without creating any buttons yet.
+        Returns the top and bottom NodeButtons and the items of the center row.
+        """
 
         # - main hotbox
         if not subMenuMode:
-            self.mode = "Single"
-
-            if len(self.selection) > 1:
-                if len(list(set([node.Class() for node in nuke.selectedNodes()]))) > 1:
-                    self.mode = "Multiple"
-
-            # Layouts
-            centerLayout = QtWidgets.QHBoxLayout()
-            centerLayout.addStretch()
-            centerLayout.addWidget(
-                HotboxButton("Reveal in %s" % getFileBrowser(), "revealInBrowser()")
-            )
-            centerLayout.addSpacing(25)
-            centerLayout.addWidget(HotboxCenter())
-            centerLayout.addSpacing(25)
-            centerLayout.addWidget(
-                HotboxButton("Hotbox Manager", "showHotboxManager()")
-            )
-            centerLayout.addStretch()
-
-            self.topLayout = NodeButtons()
-            self.bottomLayout = NodeButtons("bottom")
-
-            spacing = 12
+            topLayout = NodeButtons(context=context, build=False)
+            bottomLayout = NodeButtons("bottom", context=context, build=False)
+            centerItems = []
 
         # - submenu mode
         else:
             allItems = [
                 path + "/" + i
-                for i in sorted(os.listdir(path))
+                for i in W_hotboxCatalog.findCatalog(path).listFolder(path)
                 if i[0] not in [".", "_"]
             ]
 
@@ -114,65 +179,219 @@ class Hotbox(QtWidgets.QWidget):
                 else:
                     lists[index % 2].insert(0, item)
 
+            topLayout = NodeButtons("SubMenuTop", lists[0], context, build=False)
+            bottomLayout = NodeButtons("SubMenuBottom", lists[1], context, build=False)
+
+        return topLayout, bottomLayout, centerItems
+
+    def populate(
+        self,
+        subMenuMode=False,
+        path="",
+        name="",
+        position="",
+        context=None,
+        resolved=None,
+    ):
+        """
+        Fill the hotbox with buttons. Any buttons currently present will be recycled.
+        """
+
+        self.clear()
+
+        # - context
+        if context is None:
+            context = LaunchContext()
+
+        self.activate(context)
+
+        if resolved is None:
+            resolved = self.resolve(subMenuMode, path, context)
+
+        self.topLayout, self.bottomLayout, centerItems = resolved
+
+        # - main hotbox
+        if not subMenuMode:
+            # Layouts
+            centerLayout = QtWidgets.QHBoxLayout()
+            centerLayout.addStretch()
+            centerLayout.addWidget(
+                buttonPool.acquire(
+                    "Reveal in %s" % getFileBrowser(), "revealInBrowser()"
+                )
+            )
+            centerLayout.addSpacing(25)
+            centerLayout.addWidget(HotboxCenter(context=context))
+            centerLayout.addSpacing(25)
+            centerLayout.addWidget(
+                buttonPool.acquire("Hotbox Manager", "showHotboxManager()")
+            )
+            centerLayout.addStretch()
+
+            spacing = 12
+
+        # - submenu mode
+        else:
             # Stretch layout
             centerLayout = QtWidgets.QHBoxLayout()
 
             centerLayout.addStretch()
             for index, item in enumerate(centerItems):
-                centerLayout.addWidget(HotboxButton(item))
+                centerLayout.addWidget(buttonPool.acquire(item))
                 if index == 0:
-                    centerLayout.addWidget(HotboxCenter(False, path))
+                    centerLayout.addWidget(HotboxCenter(False, path, context))
 
             if len(centerItems) == 1:
                 centerLayout.addSpacing(105)
 
             centerLayout.addStretch()
 
-            self.topLayout = NodeButtons("SubMenuTop", lists[0])
-            self.bottomLayout = NodeButtons("SubMenuBottom", lists[1])
-
             spacing = 0
 
-        # - Equalize layouts to make sure the center layout is the center of the hotbox
-        difference = self.topLayout.count() - self.bottomLayout.count()
+        self.topLayout.build()
+        self.bottomLayout.build()
+
+        with W_hotboxTrace.span("layout"):
+            # - Equalize layouts to make sure the center layout is the center of the hotbox
+            topPadding, bottomPadding = W_hotboxLayout.layoutEngine.padding(
+                self.topLayout.rowAmount, self.bottomLayout.rowAmount
+            )
+
+            if topPadding or bottomPadding:
+                extraLayout = QtWidgets.QVBoxLayout()
+
+                for i in range(topPadding + bottomPadding):
+                    extraLayout.addSpacing(35)
+
+                if bottomPadding:
+                    self.bottomLayout.addLayout(extraLayout)
+                else:
+                    self.topLayout.insertLayout(0, extraLayout)
+
+            self.masterLayout.addLayout(self.topLayout)
+            self.masterLayout.addSpacing(spacing)
+            self.masterLayout.addLayout(centerLayout)
+            self.masterLayout.addSpacing(spacing)
+            self.masterLayout.addLayout(self.bottomLayout)
+
+            # recycled buttons were hidden when they were released
+            self.buttons = self.findChildren(HotboxButton)
+            for button in self.buttons:
+                button.show()
+
+        # keep track of the state of the repositories, to be able to tell whether the hotbox can be
+        # shown again as is.
+        self.revision = repositoryRevision()
+
+        self.place(subMenuMode, position)
+
+    def activate(self, context):
+        """
+        Prepare the hotbox to be shown for the current selection.
+        """
+
+        self.active = True
+        self.activeButton = None
+
+        self.triggerMode = preferencesNode.knob("hotboxTriggerDropdown").getValue()
+
+        self.context = context
+        self.selection = context.selection
+        self.groupRoot = context.groupRoot
+
+        self.mode = "Single"
+
+        if len(self.selection) > 1:
+            if len(context.classes) > 1:
+                self.mode = "Multiple"
+
+    def reactivate(self, subMenuMode=False, position="", context=None):
+        """
+        Show the hotbox again as it was last built.
+        """
+
+        self.activate(context)
+
+        for button in self.buttons:
+            button.setSelectionStatus()
+
+        self.place(subMenuMode, position)
+
+    def isOutdated(self):
+        """
+        Check whether any of the repositories changed since the hotbox was built. Only the revisions
+        kept by the catalogs and the loader are compared, the files themselves aren't touched.
+        """
+
+        return self.revision != repositoryRevision()
+
+    def place(self, subMenuMode=False, position=""):
+        """
+        Move the hotbox to the cursor, or to the last position.
+        """
+
+        with W_hotboxTrace.span("place"):
+            self.adjustSize()
 
-        if difference != 0:
-            extraLayout = QtWidgets.QVBoxLayout()
+            self.spwanPosition = QtGui.QCursor().pos() - QtCore.QPoint(
+                (self.width() // 2), (self.height() // 2)
+            )
+
+            # set last position if a fresh instance of the hotbox is launched
+            if position == "" and not subMenuMode:
+                global lastPosition
+                lastPosition = self.spwanPosition
 
-            for i in range(abs(difference)):
-                extraLayout.addSpacing(35)
+            if subMenuMode:
+                self.move(self.spwanPosition)
 
-            if difference > 0:
-                self.bottomLayout.addLayout(extraLayout)
             else:
-                self.topLayout.insertLayout(0, extraLayout)
+                self.move(lastPosition)
 
-        masterLayout.addLayout(self.topLayout)
-        masterLayout.addSpacing(spacing)
-        masterLayout.addLayout(centerLayout)
-        masterLayout.addSpacing(spacing)
-        masterLayout.addLayout(self.bottomLayout)
+        self.paintPending = W_hotboxTrace.enabled
 
-        # position
-        self.adjustSize()
+    def markPainted(self):
+        """
+        Record the first paint after the hotbox was placed, when tracing.
+        """
 
-        self.spwanPosition = QtGui.QCursor().pos() - QtCore.QPoint(
-            (self.width() // 2), (self.height() // 2)
-        )
+        if self.paintPending:
+            self.paintPending = False
+            W_hotboxTrace.instant("first paint")
 
-        # set last position if a fresh instance of the hotbox is launched
-        if position == "" and not subMenuMode:
-            global lastPosition
-            lastPosition = self.spwanPosition
+    def paintEvent(self, event):
+        self.markPainted()
+        return super(Hotbox, self).paintEvent(event)
 
-        if subMenuMode:
-            self.move(self.spwanPosition)
+    def clear(self, layout=None):
+        """
+        Empty the hotbox. Buttons are returned to the pool, other widgets will be deleted.
+        """
 
-        else:
-            self.move(lastPosition)
+        if layout is None:
+            layout = self.masterLayout
+            self.buttons = []
+            self.revision = None
+            self.configuration = None
 
-        # make sure the widgets closes when it loses focus
-        self.installEventFilter(self)
+        while layout.count():
+            item = layout.takeAt(0)
+
+            widget = item.widget()
+            childLayout = item.layout()
+
+            if widget is not None:
+                if isinstance(widget, HotboxButton):
+                    buttonPool.release(widget)
+                else:
+                    widget.hide()
+                    widget.setParent(None)
+                    widget.deleteLater()
+
+            elif childLayout is not None:
+                self.clear(childLayout)
+                childLayout.setParent(None)
+                childLayout.deleteLater()
 
     def closeHotbox(self, hotkey=False):
         # if the execute on close function is turned on, the hotbox will execute the selected button upon close
@@ -225,10 +444,11 @@ class NodeButtons(QtWidgets.QVBoxLayout):
     Create QLayout filled with buttons
     """
 
-    def __init__(self, mode="", allItems=""):
+    def __init__(self, mode="", allItems="", context=None, build=True):
         super(NodeButtons, self).__init__()
 
-        selectedNodes = nuke.selectedNodes()
+        if context is None:
+            context = LaunchContext()
 
         # - submenu
         if "submenu" in mode.lower():
@@ -247,9 +467,15 @@ class NodeButtons(QtWidgets.QVBoxLayout):
 
             self.path = getHotBoxLocation()
 
-            self.allRepositories = list(
-                set([self.path] + [i[1] for i in extraRepositories])
-            )
+            # repositories that are still being loaded in the background are left out
+            self.allRepositories = []
+            for repository in [self.path] + [
+                repositoryPath(i[1]) for i in extraRepositories
+            ]:
+                if repository in self.allRepositories:
+                    continue
+                if repositoryLoader.isAvailable(repository):
+                    self.allRepositories.append(repository)
 
             self.rowMaxAmount = int(preferencesNode.knob("hotboxRowAmountAll").value())
 
@@ -258,9 +484,7 @@ class NodeButtons(QtWidgets.QVBoxLayout):
             # - noncontextual
 
             if mode:
-                self.folderList += [
-                    repository + "All" for repository in self.allRepositories
-                ]
+                memoKey = ("All", tuple(self.allRepositories))
 
             # - contextual
 
@@ -274,220 +498,188 @@ class NodeButtons(QtWidgets.QVBoxLayout):
                 # - rules
                 # collect all folders storing buttons for applicable rules
 
-                ignoreClasses = False
-                tag = "# IGNORE CLASSES: "
+                allRules = []
+                for repository in self.allRepositories:
+                    allRules += W_hotboxCatalog.getCatalog(repository).rules()
+
+                # validate rules, and check if any of them has ignoreClasses enabled.
+                with W_hotboxTrace.span("rules", rules=len(allRules)):
+                    allRulePaths, ignoreClasses = W_hotboxRules.ruleEngine.evaluate(
+                        allRules,
+                        context,
+                        printRuleError,
+                        preferencesNode.knob("hotboxRuleBudget").value() / 1000.0,
+                        reportSlowRule,
+                    )
+
+                nodeClasses = []
+                if not ignoreClasses:
+                    nodeClasses = self.getNodeClasses(context)
+
+                # the outcome of the rules and the classes of the selection define which items will be shown.
+                memoKey = (
+                    "Selection",
+                    tuple(self.allRepositories),
+                    tuple(allRulePaths),
+                    ignoreClasses,
+                    tuple(
+                        (
+                            tuple(sorted(nodeClass))
+                            if isinstance(nodeClass, list)
+                            else nodeClass
+                        )
+                        for nodeClass in nodeClasses
+                    ),
+                    preferencesNode.knob("hotboxMirroredLayout").value(),
+                    preferencesNode.knob("hotboxRuleClassOrder").getValue(),
+                )
+
+            memo = W_hotboxCatalog.itemsMemo.get(memoKey)
 
-                allRulePaths = []
+            if memo:
+                self.folderList, allItems = memo
 
-                for repository in self.allRepositories:
-                    rulesFolder = repository + "Rules"
-                    if not os.path.exists(rulesFolder):
-                        continue
-
-                    rules = [
-                        "/".join([rulesFolder, rule])
-                        for rule in os.listdir(rulesFolder)
-                        if rule[0] not in ["_", "."] and rule[-1] != "_"
+            else:
+                if mode:
+                    self.folderList = [
+                        repository + "All" for repository in self.allRepositories
                     ]
+                    dependencies = list(self.folderList)
 
-                    # validate rules
-                    for rule in rules:
-                        ruleFile = rule + "/_rule.py"
-
-                        if os.path.exists(ruleFile):
-                            if self.validateRule(ruleFile):
-                                allRulePaths.append(rule)
-
-                                # read ruleFile to check if ignoreClasses was enabled.
-                                if not ignoreClasses:
-                                    for line in open(ruleFile).readlines():
-                                        # no point in checking boyond the header
-                                        if not line.startswith("#"):
-                                            break
-                                        # if proper tag is found, check its value
-                                        if line.startswith(tag):
-                                            ignoreClasses = bool(
-                                                int(
-                                                    line.split(tag)[-1].replace(
-                                                        "\n", ""
-                                                    )
-                                                )
-                                            )
-                                            break
-
-                # - classes
-                # collect all folders storing buttons for applicable classes
+                else:
+                    # - classes
+                    # collect all folders storing buttons for applicable classes
 
-                if not ignoreClasses:
                     allClassPaths = []
 
-                    nodeClasses = list(set([node.Class() for node in selectedNodes]))
+                    # Check which defined class combinations on disk are applicable to the current selection.
+                    with W_hotboxTrace.span("class folders"):
+                        for repository in self.allRepositories:
+                            catalog = W_hotboxCatalog.getCatalog(repository)
+
+                            for nodeClass in nodeClasses:
+                                if isinstance(nodeClass, list):
+                                    allClassPaths += catalog.matchCombinations(
+                                        nodeClass
+                                    )
+                                else:
+                                    classPath = catalog.classFolder(nodeClass)
+                                    if classPath:
+                                        allClassPaths.append(classPath)
+
+                    # remove duplicates, keeping the order of the repositories
+                    allClassPaths = list(OrderedDict.fromkeys(allClassPaths))
 
-                    # if nothing selected
-                    if len(nodeClasses) == 0:
-                        nodeClasses = ["No Selection"]
+                    # - combine classes and rules
+                    if ignoreClasses:
+                        self.folderList = allRulePaths
 
-                    # if selection
                     else:
-                        # check if group, if so take the name of the group, as well as the class
-                        groupNodes = []
-                        if "Group" in nodeClasses:
-                            for node in selectedNodes:
-                                if node.Class() == "Group":
-                                    groupName = node.name()
-                                    while groupName[-1] in [str(i) for i in range(10)]:
-                                        groupName = groupName[:-1]
-                                    if (
-                                        groupName not in groupNodes
-                                        and groupName != "Group"
-                                    ):
-                                        groupNodes.append(groupName)
-
-                        if len(groupNodes) > 0:
-                            groupNodes = [
-                                nodeClass
-                                for nodeClass in nodeClasses
-                                if nodeClass != "Group"
-                            ] + groupNodes
-
-                        if len(nodeClasses) > 1:
-                            nodeClasses = [nodeClasses]
-                        if len(groupNodes) > 1:
-                            groupNodes = [groupNodes]
-
-                        nodeClasses = nodeClasses + groupNodes
+                        self.folderList = allClassPaths + allRulePaths
 
-                    # Check which defined class combinations on disk are applicable to the current selection.
-                    for repository in self.allRepositories:
-                        for nodeClass in nodeClasses:
-                            if isinstance(nodeClass, list):
-                                for managerNodeClasses in [
-                                    i
-                                    for i in os.listdir(repository + "Multiple")
-                                    if i[0] not in ["_", "."]
-                                ]:
-                                    managerNodeClassesList = managerNodeClasses.split(
-                                        "-"
-                                    )
-                                    match = list(
-                                        set(nodeClass).intersection(
-                                            managerNodeClassesList
-                                        )
-                                    )
+                        if preferencesNode.knob("hotboxRuleClassOrder").getValue():
+                            self.folderList.reverse()
 
-                                    if len(match) >= len(nodeClass):
-                                        allClassPaths.append(
-                                            repository
-                                            + "Multiple/"
-                                            + managerNodeClasses
-                                        )
-                            else:
-                                allClassPaths.append(repository + "Single/" + nodeClass)
-
-                    allClassPaths = list(set(allClassPaths))
-                    allClassPaths = [
-                        path for path in allClassPaths if os.path.exists(path)
+                    dependencies = self.folderList + [
+                        repository + section
+                        for repository in self.allRepositories
+                        for section in ["Single", "Multiple"]
                     ]
 
-                # - combine classes and rules
-                if ignoreClasses:
-                    self.folderList = allRulePaths
+                # - files on disk representing items
+                allItems = []
 
-                else:
-                    self.folderList = allClassPaths + allRulePaths
-
-                    if preferencesNode.knob("hotboxRuleClassOrder").getValue():
-                        self.folderList.reverse()
+                with W_hotboxTrace.span("items"):
+                    for folder in self.folderList:
+                        allItems += W_hotboxCatalog.findCatalog(folder).items(folder)
 
-            # - files on disk representing items
-            allItems = []
+                W_hotboxCatalog.itemsMemo.store(
+                    memoKey, (self.folderList, allItems), dependencies
+                )
 
-            for folder in self.folderList:
-                for file in sorted(os.listdir(folder)):
-                    if file[0] not in [".", "_"] and len(file) in [3, 6]:
-                        allItems.append("/".join([folder, file]))
+        self.allItems = allItems
+        self.mirrored = mirrored
 
-        # - devide in rows based on the row maximum
-        allRows = []
-        row = []
+        if build:
+            self.build()
 
-        for item in allItems:
-            if preferencesNode.knob("hotboxButtonSpawnMode").value():
-                if len(row) % 2:
-                    row.append(item)
-                else:
-                    row.insert(0, item)
-            else:
-                row.append(item)
+    def rows(self):
+        """
+        Return the items found, devided over rows, in the order the rows appear on screen.
+        """
 
-            # when a row reaches its full capacity, add the row to the allRows list
-            # and start a new one. Increase rowcapacity to get a triangular shape
-            if len(row) == self.rowMaxAmount:
-                allRows.append(row)
-                row = []
-                self.rowMaxAmount += preferencesNode.knob("hotboxRowStepSize").value()
+        return W_hotboxLayout.layoutEngine.rows(
+            self.allItems,
+            self.rowMaxAmount,
+            preferencesNode.knob("hotboxRowStepSize").value(),
+            preferencesNode.knob("hotboxButtonSpawnMode").value(),
+            self.mirrored,
+        )
 
-        # if the last row is not completely full, add it to the allRows list anyway
-        if len(row) != 0:
-            allRows.append(row)
+    def build(self):
+        """
+        Create the buttons for the items found, devided over rows.
+        """
 
-        if not mirrored:
-            allRows.reverse()
+        allRows = self.rows()
 
-        # nodeHotboxLayout
-        for row in allRows:
-            self.rowLayout = QtWidgets.QHBoxLayout()
+        with W_hotboxTrace.span("buttons", buttons=len(self.allItems)):
+            # nodeHotboxLayout
+            for row in allRows:
+                self.rowLayout = QtWidgets.QHBoxLayout()
 
-            self.rowLayout.addStretch()
+                self.rowLayout.addStretch()
 
-            for button in row:
-                buttonObject = HotboxButton(button)
-                self.rowLayout.addWidget(buttonObject)
-            self.rowLayout.addStretch()
+                for button in row:
+                    buttonObject = buttonPool.acquire(button)
+                    self.rowLayout.addWidget(buttonObject)
+                self.rowLayout.addStretch()
 
-            self.addLayout(self.rowLayout)
+                self.addLayout(self.rowLayout)
 
         self.rowAmount = len(allRows)
 
-    def validateRule(self, ruleFile):
+    def getNodeClasses(self, context):
         """
-        Run the rule, return True or False.
+        Return the classes of the selection. Classes of a selection consisting of multiple classes are
+        returned as a single list. The names of group nodes (without their trailing digits) are added
+        as classes as well.
         """
 
-        error = False
-
-        # read from file
-        ruleString = open(ruleFile).read()
+        nodeClasses = list(context.classes)
 
-        # quick sanity check
-        if not "ret=" in ruleString.replace(" ", ""):
-            error = "RuleError: rule must contain variable named 'ret'"
+        # if nothing selected
+        if len(nodeClasses) == 0:
+            return ["No Selection"]
 
-        else:
-            # prepend the rulestring with a nuke import statement and make it return False by default
-            prefix = "import nuke\nret = False\n"
-            ruleString = prefix + ruleString
+        # check if group, if so take the name of the group, as well as the class
+        groupNodes = list(context.groupNames)
 
-            # run rule
-            try:
-                scope = {}
-                exec(ruleString, scope, scope)
+        if len(groupNodes) > 0:
+            groupNodes = [
+                nodeClass for nodeClass in nodeClasses if nodeClass != "Group"
+            ] + groupNodes
 
-                if "ret" in scope.keys():
-                    result = bool(scope["ret"])
+        if len(nodeClasses) > 1:
+            nodeClasses = [nodeClasses]
+        if len(groupNodes) > 1:
+            groupNodes = [groupNodes]
 
-            except:
-                error = traceback.format_exc()
+        return nodeClasses + groupNodes
 
-        # run error
-        if error:
-            printError(
-                error, buttonName=os.path.basename(os.path.dirname(ruleFile)), rule=True
-            )
-            result = False
+    def validateRule(self, ruleFile, context=None):
+        """
+        Run the rule, return True or False.
+        The launch context is available to the rule as a variable called 'context'.
+        """
 
-        # return the result of the rule
-        return result
+        return W_hotboxRules.ruleEngine.validate(
+            ruleFile,
+            context,
+            printRuleError,
+            preferencesNode.knob("hotboxRuleBudget").value() / 1000.0,
+            reportSlowRule,
+        )
 
 
 class HotboxCenter(QtWidgets.QLabel):
@@ -498,26 +690,57 @@ class HotboxCenter(QtWidgets.QLabel):
     be in their selected state. The text will be read from the _name.json file in the folder.
     """
 
-    def __init__(self, node=True, name=""):
+    def __init__(self, node=True, name="", context=None):
         super(HotboxCenter, self).__init__()
 
         self.node = node
 
+        name, textColor, nodeColor, width, height, fontSize = self.describe(
+            node, name, context
+        )
+
+        self.setText(name)
+
+        self.setAlignment(QtCore.Qt.AlignCenter)
+
+        self.setFixedWidth(width)
+        self.setFixedHeight(height)
+
+        font = QtGui.QFont(preferencesNode.knob("UIFont").value(), fontSize)
+        self.setFont(font)
+
+        self.setStyleSheet(
+            """
+                border: 1px solid black;
+                color:%s;
+                background:%s"""
+            % (textColor, nodeColor)
+        )
+
+        self.setSelectionStatus(True)
+
+    @staticmethod
+    def describe(node=True, name="", context=None):
+        """
+        Return the text, text color, background color, width, height and font size of the center button.
+        """
+
         nodeColor = "#525252"
         textColor = "#eeeeee"
 
-        selectedNodes = nuke.selectedNodes()
+        if context is None:
+            context = LaunchContext()
 
         if node:
             # if no node selected
-            if len(selectedNodes) == 0:
+            if len(context.selection) == 0:
                 name = "W_hotbox"
                 nodeColorRGB = interface2rgb(640034559)
 
             # if node(s) selected
             else:
-                name = nuke.selectedNode().name()
-                nodeColorRGB = interface2rgb(getTileColor())
+                name = context.node().name()
+                nodeColorRGB = interface2rgb(context.tileColor())
 
             if preferencesNode.knob("hotboxColorCenter").value():
                 nodeColor = rgb2hex(nodeColorRGB)
@@ -532,37 +755,20 @@ class HotboxCenter(QtWidgets.QLabel):
             width = 115
             height = 60
 
-            if (len(set([i.Class() for i in selectedNodes]))) > 1:
+            if len(context.classes) > 1:
                 name = "Selection"
 
         else:
-            name = open(name + "/_name.json").read()
+            name = repositoryLoader.getName(name)
             nodeColor = getSelectionColor()
 
             width = 105
             height = 35
 
-        self.setText(name)
-
-        self.setAlignment(QtCore.Qt.AlignCenter)
-
-        self.setFixedWidth(width)
-        self.setFixedHeight(height)
-
         # resize font based on length of name
         fontSize = int(max(5, (13 - (max(0, (len(name) - 11)) / 2))))
-        font = QtGui.QFont(preferencesNode.knob("UIFont").value(), fontSize)
-        self.setFont(font)
-
-        self.setStyleSheet(
-            """
-                border: 1px solid black;
-                color:%s;
-                background:%s"""
-            % (textColor, nodeColor)
-        )
 
-        self.setSelectionStatus(True)
+        return name, textColor, nodeColor, width, height, fontSize
 
     def setSelectionStatus(self, selected=False):
         """
@@ -595,23 +801,28 @@ class HotboxCenter(QtWidgets.QLabel):
 
 
 # - Buttons
-class HotboxButton(QtWidgets.QLabel):
+class HotboxItem(object):
     """
-    Button class
+    The file, folder or function a button is linked to, and the colors it will be shown in.
+    Shared by the buttons of the hotbox and the items of the hotbox canvas.
     """
 
-    def __init__(self, name, function=None):
-        super(HotboxButton, self).__init__()
+    def setupItem(self, name, function=None):
+        """
+        Link the item to a file, folder or function. Returns the text to be shown.
+        """
 
         self.menuButton = False
+        self.function = None
         self.filePath = name
+        self.scriptFile = None
         self.bgColor = "#525252"
 
         self.borderColor = "#000000"
 
         # set the border color to grey for buttons from an additional repository
         for index, i in enumerate(extraRepositories):
-            if name.startswith(i[1]):
+            if name.startswith(i[1]) or name.startswith(repositoryPath(i[1])):
                 self.borderColor = "#959595"
                 break
 
@@ -621,38 +832,26 @@ class HotboxButton(QtWidgets.QLabel):
         else:
             # - Button linked to folder
 
-            if os.path.isdir(self.filePath):
+            # extra repositories loaded in the background are never read from here, see W_hotboxLoader
+            if repositoryLoader.isFolder(self.filePath):
                 self.menuButton = True
-                name = open(self.filePath + "/_name.json").read()
+                name = repositoryLoader.getName(self.filePath)
                 self.function = 'showHotboxSubMenu(r"%s","%s")' % (self.filePath, name)
                 self.bgColor = "#333333"
 
             # - Button linked to file
+            # only the header is read, the script is read when the button gets invoked (see getCode)
             else:
-                self.openFile = open(name).readlines()
-
-                header = []
-                for index, line in enumerate(self.openFile):
-                    if not line.startswith("#"):
-                        self.function = "".join(self.openFile[index:])
-                        break
-
-                    header.append(line)
-
-                tags = ["# %s: " % tag for tag in ["NAME", "TEXTCOLOR", "COLOR"]]
-
-                tagResults = []
+                self.scriptFile = name
+                fileInfo = repositoryLoader.getHeader(name)
 
-                for tag in tags:
-                    tagResult = None
-                    for line in header:
-                        if line.startswith(tag):
-                            tagResult = line.split(tag)[-1].replace("\n", "")
-                            break
+                # the file got removed since its folder was listed
+                if fileInfo is None:
+                    return ""
 
-                    tagResults.append(tagResult)
-
-                name, textColor, color = tagResults
+                name, textColor, color = [
+                    fileInfo.getAttribute(tag) for tag in ["NAME", "TEXTCOLOR", "COLOR"]
+                ]
 
                 if textColor and name:
                     name = '<font color = "%s">%s</font>' % (textColor, name)
@@ -660,62 +859,205 @@ class HotboxButton(QtWidgets.QLabel):
                 if color:
                     self.bgColor = color
 
-        self.setAlignment(QtCore.Qt.AlignCenter)
-        self.setMouseTracking(True)
-        self.setFixedWidth(105)
-        self.setFixedHeight(35)
-
-        fontSize = preferencesNode.knob("hotboxFontSize").value()
-        font = QtGui.QFont(
-            preferencesNode.knob("UIFont").value(), fontSize, QtGui.QFont.Bold
-        )
-
-        self.setFont(font)
-        self.setWordWrap(True)
-        self.setTextFormat(QtCore.Qt.RichText)
-
-        self.setText(name)
-
-        self.setAlignment(QtCore.Qt.AlignCenter)
-
-        self.selected = False
-        self.setSelectionStatus()
+        return name
 
     def invokeButton(self):
         """
         Execute script attached to button
         """
 
-        with nuke.toNode(hotboxInstance.groupRoot):
+        raised = False
+        profiled = self.scriptFile and profilingRequested()
+        startTime = W_hotboxTelemetry.timer()
+
+        with nuke.toNode(hotboxInstance.groupRoot), W_hotboxTrace.span(
+            "invokeButton", "invoke", button=self.filePath
+        ):
             try:
-                scope = globals().copy()
-                exec(self.function, scope, scope)
+                if profiled:
+                    self.profile()
+                else:
+                    self.runScript()
 
             except:
+                raised = True
                 printError(traceback.format_exc(), self.filePath, self.text())
 
-        # if 'close on click' is ticked, close the hotbox
-        if not self.menuButton:
+        # profiled invocations are slowed down by the profiler, so they'd skew the statistics
+        if (
+            self.scriptFile
+            and not profiled
+            and preferencesNode.knob("hotboxTelemetry").value()
+        ):
+            telemetryStore.record(
+                originalPath(self.scriptFile),
+                W_hotboxTelemetry.timer() - startTime,
+                raised,
+                len(hotboxInstance.selection),
+            )
+
+        # if 'close on click' is ticked, close the hotbox
+        if not self.menuButton:
             if (
                 preferencesNode.knob("hotboxCloseOnClick").value()
                 and preferencesNode.knob("hotboxTriggerDropdown").getValue()
             ):
                 hotboxInstance.closeHotbox()
 
+    def runScript(self):
+        """
+        Execute the script attached to the button, without catching any errors.
+        """
+
+        code = self.getCode()
+
+        # a fresh copy of the module's namespace, so buttons can't pollute it
+        scope = globals().copy()
+        exec(code, scope, scope)
+
+    def profile(self):
+        """
+        Execute the script attached to the button under cProfile.
+        """
+
+        repository = W_hotboxCatalog.findCatalog(self.scriptFile).root
+        header = W_hotboxCache.getHeader(self.scriptFile)
+
+        W_hotboxProfile.profile(
+            self.runScript,
+            profileFolder,
+            {
+                "name": header.getAttribute("NAME") if header else None,
+                "path": originalPath(self.scriptFile),
+                "repository": originalPath(repository),
+            },
+            nuke.tprint,
+        )
+
+    def getCode(self):
+        """
+        Return the compiled version of the script attached to the button.
+        """
+
+        if not self.scriptFile:
+            return W_hotboxCache.codeCache.compileString(self.function)
+
+        W_hotboxPrefetch.prefetcher.claim(("script", self.scriptFile))
+
+        return W_hotboxCache.codeCache.getCode(self.scriptFile, self.bytecodeFolder())
+
+    def bytecodeFolder(self):
+        """
+        Return the folder the compiled script is stored in, or None if not enabled in the preferences.
+        """
+
+        if not preferencesNode.knob("hotboxBytecodeCache").value():
+            return None
+
+        return W_hotboxCatalog.findCatalog(self.scriptFile).root + bytecodeFolderName
+
+    def prefetch(self):
+        """
+        Compile the script, or read the content of the submenu, in the background. Called when the
+        cursor enters the button, ahead of a click.
+        """
+
+        if self.scriptFile:
+            W_hotboxPrefetch.prefetcher.request(
+                ("script", self.scriptFile),
+                W_hotboxCache.codeCache.getCode,
+                self.scriptFile,
+                self.bytecodeFolder(),
+            )
+
+        elif self.menuButton:
+            W_hotboxPrefetch.prefetcher.request(
+                ("folder", self.filePath),
+                W_hotboxPrefetch.prefetchFolder,
+                self.filePath,
+            )
+
+
+class HotboxButton(QtWidgets.QLabel, HotboxItem):
+    """
+    Button class
+    """
+
+    def __init__(self, name=None, function=None):
+        super(HotboxButton, self).__init__()
+
+        self.setAlignment(QtCore.Qt.AlignCenter)
+        self.setMouseTracking(True)
+        self.setFixedWidth(105)
+        self.setFixedHeight(35)
+
+        self.setWordWrap(True)
+        self.setTextFormat(QtCore.Qt.RichText)
+
+        self.selected = False
+        self.painted = False
+
+        if name is not None:
+            self.setup(name, function)
+
+    def setup(self, name, function=None):
+        """
+        Link the button to a file, folder or function. Buttons get recycled, so this might be called
+        more than once in the lifetime of a button.
+        """
+
+        name = self.setupItem(name, function)
+
+        self.buttonStyle = getButtonStyle()
+        self.painted = self.buttonStyle.painted
+
+        self.setFont(self.buttonStyle.font)
+
+        # painted buttons draw their own text, no need for the label to layout the rich text.
+        self.label = name
+        if self.painted:
+            self.staticText = self.buttonStyle.getStaticText(name)
+            self.backgroundColor = getQColor(self.bgColor)
+            self.outlineColor = getQColor(self.borderColor)
+
+            QtWidgets.QLabel.setText(self, "")
+            if self.styleSheet():
+                self.setStyleSheet("")
+        else:
+            self.setText(name)
+
+        self.selected = False
+        self.setSelectionStatus()
+
+    def text(self):
+        """
+        Return the name of the button.
+        """
+
+        if self.painted:
+            return self.label
+
+        return super(HotboxButton, self).text()
+
     def setSelectionStatus(self, selected=False):
         """
         Define the style of the button for different states
         """
 
+        # painted buttons only have to be repainted
+        if self.painted:
+            if selected != self.selected:
+                self.update()
+
         # if button becomes selected
-        if selected:
+        elif selected:
             self.setStyleSheet(
                 """
                                 border: 1px solid black;
                                 background:%s;
                                 color:#eeeeee;
                                 """
-                % getSelectionColor()
+                % self.buttonStyle.selectionColorHex
             )
 
         # if button becomes unselected
@@ -746,11 +1088,46 @@ class HotboxButton(QtWidgets.QLabel):
 
         self.selected = selected
 
+    def paintEvent(self, event):
+        """
+        Draw the button, when set to be painted rather than styled.
+        """
+
+        if not self.painted:
+            return super(HotboxButton, self).paintEvent(event)
+
+        painter = QtGui.QPainter(self)
+
+        if self.selected:
+            painter.setPen(self.buttonStyle.selectedBorderColor)
+            painter.setBrush(self.buttonStyle.selectionColor)
+        else:
+            painter.setPen(self.outlineColor)
+            painter.setBrush(self.backgroundColor)
+
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+        # text
+        painter.setFont(self.buttonStyle.font)
+        painter.setPen(self.buttonStyle.textColor)
+
+        textSize = self.staticText.size()
+        painter.drawStaticText(
+            QtCore.QPointF(
+                (self.width() - textSize.width()) / 2.0,
+                (self.height() - textSize.height()) / 2.0,
+            ),
+            self.staticText,
+        )
+
+        painter.end()
+
     def enterEvent(self, event):
         """
         Change color of the button when the mouse starts hovering over it
         """
         self.setSelectionStatus(True)
+        self.prefetch()
         return True
 
     def leaveEvent(self, event):
@@ -760,19 +1137,797 @@ class HotboxButton(QtWidgets.QLabel):
         self.setSelectionStatus()
         return True
 
-    def mouseReleaseEvent(self, event):
-        """
-        Execute the buttons' self.function (str)
-        """
-        if self.selected:
-            nuke.Undo().name(self.text())
-            nuke.Undo().begin()
+    def mouseReleaseEvent(self, event):
+        """
+        Execute the script attached to the button
+        """
+        if self.selected:
+            nuke.Undo().name(self.text())
+            nuke.Undo().begin()
+
+            self.invokeButton()
+
+            nuke.Undo().end()
+
+        return True
+
+
+# - Canvas
+
+
+class CanvasItem(HotboxItem):
+    """
+    A button of the hotbox canvas. Not a widget, just a rectangle the canvas paints and hit-tests.
+    """
+
+    def __init__(self, name, function=None):
+        self.label = self.setupItem(name, function)
+        self.rect = QtCore.QRect()
+        self.selected = False
+
+    def text(self):
+        """
+        Return the name of the button.
+        """
+        return self.label
+
+
+class CanvasCenter(object):
+    """
+    The center button of the hotbox canvas.
+    """
+
+    def __init__(self, node=True, name="", context=None):
+        self.node = node
+        self.rect = QtCore.QRect()
+        self.selected = False
+
+        self.label, textColor, nodeColor, width, height, fontSize = (
+            HotboxCenter.describe(node, name, context)
+        )
+
+        self.size = (width, height)
+        self.textColor = getQColor(textColor)
+        self.backgroundColor = getQColor(nodeColor)
+        self.font = QtGui.QFont(preferencesNode.knob("UIFont").value(), fontSize)
+
+
+class HotboxCanvas(Hotbox):
+    """
+    Alternative to the Hotbox that consists of a single widget. Rather than creating a widget for every
+    button, the rows NodeButtons would build are laid out as rectangles, painted in one go and looked up
+    in a grid of rectangles to find the button underneath the cursor.
+    """
+
+    def __init__(
+        self,
+        subMenuMode=False,
+        path="",
+        name="",
+        position="",
+        context=None,
+        populate=True,
+    ):
+        super(HotboxCanvas, self).__init__(populate=False)
+
+        self.setMouseTracking(True)
+
+        self.items = []
+        self.grid = []
+        self.gridTops = []
+        self.hoverItem = None
+        self.center = None
+
+        if populate:
+            self.populate(subMenuMode, path, name, position, context)
+
+    def populate(
+        self,
+        subMenuMode=False,
+        path="",
+        name="",
+        position="",
+        context=None,
+        resolved=None,
+    ):
+        """
+        Lay out the buttons of the hotbox.
+        """
+
+        self.clear()
+
+        # - context
+        if context is None:
+            context = LaunchContext()
+
+        self.activate(context)
+
+        if resolved is None:
+            resolved = self.resolve(subMenuMode, path, context)
+
+        self.topLayout, self.bottomLayout, centerItems = resolved
+
+        self.buttonStyle = getButtonStyle()
+
+        # - center row
+        if not subMenuMode:
+            self.center = CanvasCenter(context=context)
+            centerRow = [
+                CanvasItem("Reveal in %s" % getFileBrowser(), "revealInBrowser()"),
+                25,
+                self.center,
+                25,
+                CanvasItem("Hotbox Manager", "showHotboxManager()"),
+            ]
+
+            spacing = 12
+
+        else:
+            self.center = CanvasCenter(False, path, context)
+            centerRow = []
+            for index, item in enumerate(centerItems):
+                centerRow.append(CanvasItem(item))
+                if index == 0:
+                    centerRow.append(self.center)
+
+            if len(centerItems) == 1:
+                centerRow.append(W_hotboxLayout.layoutEngine.buttonWidth)
+
+            spacing = 0
+
+        with W_hotboxTrace.span("buttons"):
+            topRows = [
+                [CanvasItem(item) for item in row] for row in self.topLayout.rows()
+            ]
+            bottomRows = [
+                [CanvasItem(item) for item in row] for row in self.bottomLayout.rows()
+            ]
+
+        # - Equalize rows to make sure the center row is the center of the hotbox
+        topPadding, bottomPadding = W_hotboxLayout.layoutEngine.padding(
+            len(topRows), len(bottomRows)
+        )
+
+        topRows = [[] for i in range(topPadding)] + topRows
+        bottomRows += [[] for i in range(bottomPadding)]
+
+        with W_hotboxTrace.span("layout"):
+            self.layoutRows(topRows + [centerRow] + bottomRows, len(topRows), spacing)
+
+        self.revision = repositoryRevision()
+
+        self.update()
+        self.place(subMenuMode, position)
+
+    def layoutRows(self, rows, centerRowIndex, spacing):
+        """
+        Position every item and build the grid used to find the item underneath the cursor.
+        """
+
+        def itemSize(item):
+            if isinstance(item, CanvasCenter):
+                return item.size
+            return (layoutEngine.buttonWidth, layoutEngine.buttonHeight)
+
+        layoutEngine = W_hotboxLayout.layoutEngine
+        width, height, placedRows = layoutEngine.placeRows(
+            rows, centerRowIndex, spacing, itemSize
+        )
+
+        self.items = []
+        self.grid = []
+        self.gridTops = []
+
+        for top, bottom, placedItems in placedRows:
+            lefts = []
+            rowItems = []
+
+            for x, y, itemWidth, itemHeight, item in placedItems:
+                item.rect = QtCore.QRect(x, y, itemWidth, itemHeight)
+
+                if isinstance(item, CanvasItem):
+                    self.items.append(item)
+
+                lefts.append(x)
+                rowItems.append(item)
+
+            self.grid.append((top, bottom, lefts, rowItems))
+            self.gridTops.append(top)
+
+        self.setFixedSize(width, height)
+
+    def itemAt(self, position):
+        """
+        Return the item underneath a position, or None.
+        """
+
+        x = position.x()
+        y = position.y()
+
+        rowIndex = bisect.bisect_right(self.gridTops, y) - 1
+        if rowIndex < 0:
+            return None
+
+        top, bottom, lefts, rowItems = self.grid[rowIndex]
+        if y >= bottom:
+            return None
+
+        column = bisect.bisect_right(lefts, x) - 1
+        if column < 0:
+            return None
+
+        item = rowItems[column]
+        if not item.rect.contains(position):
+            return None
+
+        # the center of the main hotbox isn't a button
+        if isinstance(item, CanvasCenter) and item.node:
+            return None
+
+        return item
+
+    def setHoverItem(self, item):
+        """
+        Select the item underneath the cursor.
+        """
+
+        if item is self.hoverItem:
+            return
+
+        for changedItem, selected in [(self.hoverItem, False), (item, True)]:
+            if changedItem is not None:
+                changedItem.selected = selected
+                self.update(changedItem.rect)
+
+        self.hoverItem = item
+
+        if isinstance(item, CanvasItem):
+            item.prefetch()
+
+        if preferencesNode.knob("hotboxExecuteOnClose").value():
+            self.activeButton = None
+
+            # if launch mode set to Press and Hold and the button is a menu button,
+            # dont open a submenu upon shortcut release
+            if (
+                isinstance(item, CanvasItem)
+                and not item.menuButton
+                and not preferencesNode.knob("hotboxTriggerDropdown").getValue()
+            ):
+                self.activeButton = item
+
+    def reactivate(self, subMenuMode=False, position="", context=None):
+        """
+        Show the hotbox again as it was last built.
+        """
+
+        self.activate(context)
+        self.setHoverItem(None)
+        self.place(subMenuMode, position)
+
+    def clear(self, layout=None):
+        """
+        Empty the hotbox.
+        """
+
+        self.items = []
+        self.grid = []
+        self.gridTops = []
+        self.hoverItem = None
+        self.center = None
+
+        self.buttons = []
+        self.revision = None
+        self.configuration = None
+
+    def paintEvent(self, event):
+        """
+        Draw the buttons that intersect the region that needs to be repainted.
+        """
+
+        self.markPainted()
+
+        painter = QtGui.QPainter(self)
+        exposed = event.rect()
+
+        buttonStyle = self.buttonStyle
+
+        for item in self.items:
+            if not exposed.intersects(item.rect):
+                continue
+
+            if item.selected:
+                painter.setPen(buttonStyle.selectedBorderColor)
+                painter.setBrush(buttonStyle.selectionColor)
+            else:
+                painter.setPen(getQColor(item.borderColor))
+                painter.setBrush(getQColor(item.bgColor))
+
+            painter.drawRect(item.rect.adjusted(0, 0, -1, -1))
+
+            staticText = buttonStyle.getStaticText(item.label)
+            textSize = staticText.size()
+
+            painter.setFont(buttonStyle.font)
+            painter.setPen(buttonStyle.textColor)
+            painter.drawStaticText(
+                QtCore.QPointF(
+                    item.rect.x() + (item.rect.width() - textSize.width()) / 2.0,
+                    item.rect.y() + (item.rect.height() - textSize.height()) / 2.0,
+                ),
+                staticText,
+            )
+
+        center = self.center
+        if center is not None and exposed.intersects(center.rect):
+            painter.setPen(buttonStyle.selectedBorderColor)
+            painter.setBrush(center.backgroundColor)
+            painter.drawRect(center.rect.adjusted(0, 0, -1, -1))
+
+            painter.setFont(center.font)
+            painter.setPen(center.textColor)
+            painter.drawText(center.rect, QtCore.Qt.AlignCenter, center.label)
+
+        painter.end()
+
+    def mouseMoveEvent(self, event):
+        self.setHoverItem(self.itemAt(event.pos()))
+
+    def leaveEvent(self, event):
+        self.setHoverItem(None)
+
+    def mouseReleaseEvent(self, event):
+        """
+        Execute the button underneath the cursor.
+        """
+
+        item = self.itemAt(event.pos())
+
+        if item is None:
+            return True
+
+        if isinstance(item, CanvasCenter):
+            showHotbox(True, resetPosition=False)
+
+        else:
+            nuke.Undo().name(item.text())
+            nuke.Undo().begin()
+
+            item.invokeButton()
+
+            nuke.Undo().end()
+
+        return True
+
+
+# - Pools
+
+
+class HotboxButtonPool(object):
+    """
+    Free list of HotboxButtons. Creating widgets is expensive, so buttons of a hotbox that gets cleared
+    are kept around to be used for the next hotbox.
+    """
+
+    def __init__(self, maxSize=200):
+        self.maxSize = maxSize
+        self.freeButtons = []
+
+        # statistics
+        self.created = 0
+        self.recycled = 0
+
+    def acquire(self, name, function=None):
+        """
+        Return a button linked to name/function.
+        """
+
+        if self.freeButtons:
+            button = self.freeButtons.pop()
+            self.recycled += 1
+        else:
+            button = HotboxButton()
+            self.created += 1
+
+        button.setup(name, function)
+        return button
+
+    def release(self, button):
+        """
+        Return a button to the pool.
+        """
+
+        button.hide()
+        button.setParent(None)
+
+        if len(self.freeButtons) < self.maxSize:
+            self.freeButtons.append(button)
+        else:
+            button.deleteLater()
+
+    def prewarm(self, amount):
+        """
+        Fill the pool with buttons in advance.
+        """
+
+        while len(self.freeButtons) < min(amount, self.maxSize):
+            self.freeButtons.append(HotboxButton())
+            self.created += 1
+
+
+class HotboxPool(object):
+    """
+    Keeps the last built hotboxes around. When the hotbox gets launched with the same configuration
+    (same items, same center button, same preferences) it can be shown as is. Otherwise the least
+    recently used hotbox will be cleared and filled again.
+    """
+
+    def __init__(self):
+        self.hotboxes = []
+
+        # statistics
+        self.reused = 0
+        self.repopulated = 0
+
+    def capacity(self):
+        """
+        The amount of hotboxes kept fully built, as set in the preferences.
+        """
+
+        return max(1, int(preferencesNode.knob("hotboxKeepBuilt").value()))
+
+    def hotboxClass(self):
+        """
+        The type of hotbox to build, as set in the preferences.
+        """
+
+        if preferencesNode.knob("hotboxSingleCanvas").value():
+            return HotboxCanvas
+
+        return Hotbox
+
+    def configurationKey(self, subMenuMode, path, name, context, resolved):
+        """
+        Return a value describing everything that defines the appearance of a hotbox.
+        """
+
+        topLayout, bottomLayout, centerItems = resolved
+
+        # the name of a submenu is shown in its center
+        if subMenuMode:
+            center = (path, name)
+        elif context.selection:
+            center = (context.node().name(), context.tileColor(), len(context.classes))
+        else:
+            center = None
+
+        preferences = tuple(
+            preferencesNode.knob(knob).value()
+            for knob in [
+                "UIFont",
+                "hotboxFontSize",
+                "hotboxColorDropdown",
+                "hotboxColorCustom",
+                "hotboxColorCenter",
+                "hotboxButtonSpawnMode",
+                "hotboxRowStepSize",
+                "hotboxPaintedButtons",
+                "hotboxSingleCanvas",
+            ]
+        )
+
+        return (
+            subMenuMode,
+            center,
+            tuple(topLayout.allItems),
+            topLayout.rowMaxAmount,
+            topLayout.mirrored,
+            tuple(bottomLayout.allItems),
+            bottomLayout.rowMaxAmount,
+            bottomLayout.mirrored,
+            tuple(centerItems),
+            tuple(repositoryPath(repository[1]) for repository in extraRepositories),
+            preferences,
+        )
+
+    def refresh(self):
+        """
+        Build the hotbox on screen again when its items changed, for example because an extra
+        repository finished loading. The hotbox stays centered where it is.
+        """
+
+        hotbox = hotboxInstance
+
+        if hotbox is None or not hotbox.active or not hotbox.isVisible():
+            return
+
+        # submenus only ever show a single folder
+        if hotbox.configuration is None or hotbox.configuration[0]:
+            return
+
+        resolved = Hotbox.resolve(False, "", hotbox.context)
+        key = self.configurationKey(False, "", "", hotbox.context, resolved)
+
+        if key == hotbox.configuration:
+            return
+
+        center = hotbox.geometry().center()
+
+        hotbox.populate(False, "", "", center, hotbox.context, resolved)
+        hotbox.configuration = key
+
+        global lastPosition
+        lastPosition = center - QtCore.QPoint(hotbox.width() // 2, hotbox.height() // 2)
+        hotbox.move(lastPosition)
+
+    def getHotbox(self, subMenuMode=False, path="", name="", position="", context=None):
+        """
+        Return a hotbox ready to be shown.
+        """
+
+        if context is None:
+            with W_hotboxTrace.span("selection"):
+                context = LaunchContext()
+
+        with W_hotboxTrace.span("resolve"):
+            resolved = Hotbox.resolve(subMenuMode, path, context)
+
+        key = self.configurationKey(subMenuMode, path, name, context, resolved)
+
+        hotboxClass = self.hotboxClass()
+
+        # hotboxes currently on screen can't be touched.
+        available = [
+            hotbox
+            for hotbox in self.hotboxes
+            if not hotbox.isVisible() and type(hotbox) is hotboxClass
+        ]
+
+        keepBuilt = preferencesNode.knob("hotboxKeepBuilt").value() > 0
+
+        for hotbox in available:
+            if keepBuilt and hotbox.configuration == key and not hotbox.isOutdated():
+                self.hotboxes.remove(hotbox)
+                self.hotboxes.append(hotbox)
+                self.reused += 1
+
+                with W_hotboxTrace.span("reactivate"):
+                    hotbox.reactivate(subMenuMode, position, context)
+
+                return hotbox
+
+        # reuse the least recently used hotbox, or create a new one when all of them are in use.
+        if available and len(self.hotboxes) >= self.capacity():
+            hotbox = available[0]
+            self.hotboxes.remove(hotbox)
+        else:
+            hotbox = hotboxClass(populate=False)
+
+        self.hotboxes.append(hotbox)
+        self.repopulated += 1
+
+        with W_hotboxTrace.span("populate"):
+            hotbox.populate(subMenuMode, path, name, position, context, resolved)
+
+        hotbox.configuration = key
+
+        self.trim(hotbox)
+
+        return hotbox
+
+    def trim(self, keep=None):
+        """
+        Get rid of the least recently used hotboxes that exceed the capacity.
+        """
+
+        available = [
+            hotbox
+            for hotbox in self.hotboxes
+            if not hotbox.isVisible() and hotbox is not keep
+        ]
+
+        while available and len(self.hotboxes) > self.capacity():
+            hotbox = available.pop(0)
+            self.hotboxes.remove(hotbox)
+
+            hotbox.clear()
+            hotbox.deleteLater()
+
+    def prewarm(self):
+        """
+        Create an empty hotbox and a set of buttons in advance, so the first launch doesn't have to.
+        """
+
+        hotboxClass = self.hotboxClass()
+
+        if not self.hotboxes:
+            self.hotboxes.append(hotboxClass(populate=False))
+
+        if hotboxClass is Hotbox:
+            buttonPool.prewarm(30)
+
+
+# - Watcher
+
+
+class CatalogWatcher(QtCore.QObject):
+    """
+    Watches the folders listed by the catalogs, and invalidates a listing as soon as the folder
+    changes on disk.
+    """
+
+    def __init__(self):
+        super(CatalogWatcher, self).__init__()
+
+        self.watcher = QtCore.QFileSystemWatcher()
+        self.watcher.directoryChanged.connect(self.folderChanged)
+
+        self.folders = set()
+
+        # statistics
+        self.changes = 0
+
+    def watch(self, path):
+        """
+        Start watching a folder. Returns False if the folder can't be watched.
+        """
+
+        if path in self.folders:
+            return True
+
+        if not self.watcher.addPath(path):
+            return False
+
+        self.folders.add(path)
+        return True
+
+    def folderChanged(self, path):
+        """
+        Forget the listing of a folder that changed. Its subfolders are watched themselves.
+        """
+
+        self.changes += 1
+
+        # removed folders are no longer watched
+        if not os.path.isdir(path):
+            self.folders.discard(path)
+
+        W_hotboxCatalog.invalidateCatalogs(path, recursive=False)
+
+
+def updateCatalogWatcher():
+    """
+    Install or remove the catalog watcher, depending on the preferences.
+    """
+
+    global catalogWatcher
+
+    watch = bool(preferencesNode.knob("hotboxWatchRepositories").value())
+
+    if watch and catalogWatcher is None:
+        catalogWatcher = CatalogWatcher()
+        W_hotboxCatalog.setWatcher(catalogWatcher)
+
+    elif not watch and catalogWatcher is not None:
+        W_hotboxCatalog.setWatcher(None)
+        catalogWatcher.watcher.deleteLater()
+        catalogWatcher = None
+
+
+# - Mirrors
+
+
+def updateMirrors():
+    """
+    Start syncing the local mirrors of the extra repositories, when enabled in the preferences. Until
+    a mirror was completed once, the repository is read from its original location.
+    """
+
+    repositoryPaths.clear()
+
+    if not preferencesNode.knob("hotboxMirrorRepositories").value():
+        return
+
+    for name, path in extraRepositories:
+        # a pack is a single file already
+        if W_hotboxPack.isPacked(path):
+            continue
+
+        mirror = W_hotboxMirror.getMirror(name, path, mirrorFolder)
+        mirror.onSynced = mirrorSynced
+        mirror.start()
+
+        if mirror.ready():
+            repositoryPaths[path] = mirror.local
+
+
+def mirrorSynced(mirror):
+    """
+    Called from the syncing thread whenever files of a mirror were updated.
+    """
+
+    nuke.executeInMainThread(W_hotboxCatalog.invalidateCatalogs, (mirror.local,))
+
+
+def repositoryPath(path):
+    """
+    Return the folder an extra repository is read from.
+    """
+    return repositoryPaths.get(path, path)
+
+
+def originalPath(path):
+    """
+    Return the original location of a file read from the mirror of an extra repository.
+    """
+
+    for source, local in repositoryPaths.items():
+        if path.startswith(local):
+            return source + path[len(local) :]
+
+    return path
+
+
+# - Loading
+
+
+def updateRepositoryLoads():
+    """
+    Start loading the extra repositories in the background, when enabled in the preferences.
+    """
+
+    collectRepositoryLoads()
+
+    if not preferencesNode.knob("hotboxBackgroundLoading").value():
+        for root in repositoryLoader.loads.keys():
+            W_hotboxCatalog.getCatalog(root).background = False
+
+        repositoryLoader.loads.clear()
+        return
+
+    for name, path in extraRepositories:
+        # packs and local mirrors are quick to read
+        if W_hotboxPack.isPacked(path) or repositoryPath(path) != path:
+            continue
+
+        repositoryLoader.start(path)
+
+    if repositoryLoader.isLoading() and not repositoryTimer.isActive():
+        repositoryTimer.start()
+
+
+def repositoryRevision():
+    """
+    Return a value that changes whenever any of the repositories changed, as far as the catalogs and
+    the loader know.
+    """
+
+    return W_hotboxCatalog.catalogRevision(), repositoryLoader.revision
+
+
+def collectRepositoryLoads():
+    """
+    Hand the repositories that finished loading to their catalogs, and show their buttons in the
+    hotbox currently on screen.
+    """
+
+    changed = False
+
+    for load in repositoryLoader.collect():
+        catalog = W_hotboxCatalog.getCatalog(load.root)
+
+        # the first load makes the repository available, which changes the items as well
+        if not catalog.background:
+            catalog.background = True
+            changed = True
 
-            self.invokeButton()
+        changed = catalog.update(load.folders) or changed
 
-            nuke.Undo().end()
+    if not repositoryLoader.isLoading():
+        repositoryTimer.stop()
 
-        return True
+    if changed:
+        hotboxPool.refresh()
 
 
 # ----------------------------------------------------------------------------------------------------------
@@ -956,6 +2111,146 @@ def addPreferences():
 
     addToPreferences(knob, tooltip)
 
+    # keep built
+    knob = nuke.Int_Knob("hotboxKeepBuilt", "Keep built")
+    knob.setValue(3)
+
+    tooltip = (
+        "The amount of hotboxes that will be kept in memory fully built. Launching the hotbox for a "
+        "selection it was recently launched for will show the previously built hotbox, rather than "
+        "building a new one. Set to 0 to always rebuild the hotbox."
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # bytecode cache
+    knob = nuke.Boolean_Knob("hotboxBytecodeCache", "Cache compiled buttons on disk")
+    knob.setValue(False)
+    knob.setFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Store the compiled scripts of the buttons in a folder called '%s' inside the repository, "
+        "so they don't have to be compiled again in the next session."
+        % bytecodeFolderName
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # watch repositories
+    knob = nuke.Boolean_Knob("hotboxWatchRepositories", "Watch repositories")
+    knob.setValue(True)
+    knob.clearFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Get notified by the operating system when the folders of a repository change, rather than "
+        "checking every folder whenever the hotbox is launched. Folders are still checked every 30 "
+        "seconds, for network locations that don't report every change."
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # mirror repositories
+    knob = nuke.Boolean_Knob("hotboxMirrorRepositories", "Mirror extra repositories")
+    knob.setValue(False)
+    knob.clearFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Keep a local copy of the extra repositories in '%s', and launch the hotbox from that copy. "
+        "The copy is synced in the background every %i minutes, and keeps working when the original "
+        "location is slow or can't be reached."
+        % (mirrorFolder, W_hotboxMirror.RepositoryMirror.syncInterval // 60)
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # background loading
+    knob = nuke.Boolean_Knob("hotboxBackgroundLoading", "Background loading")
+    knob.setValue(True)
+    knob.setFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Read the extra repositories on background threads. The buttons of the local repository are "
+        "shown right away, the buttons of an extra repository are added as soon as it's loaded. A "
+        "repository that takes longer than %i seconds to load is left out until it responds again."
+        % W_hotboxLoader.RepositoryLoader.timeout
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # rule budget
+    knob = nuke.Int_Knob("hotboxRuleBudget", "Rule time budget (ms)")
+    knob.setValue(50)
+    knob.setFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Report rules that take longer than this amount of milliseconds to evaluate. Set to 0 to never "
+        "report. The timings of all rules can be printed from the W_hotbox menu."
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # rule auto disable
+    knob = nuke.Boolean_Knob("hotboxRuleAutoDisable", "Disable slow rules")
+    knob.setValue(False)
+    knob.clearFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Skip rules that take longer than the time budget on average, for the rest of the session. "
+        "The rules themselves are left untouched."
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # telemetry
+    knob = nuke.Boolean_Knob("hotboxTelemetry", "Button statistics")
+    knob.setValue(True)
+    knob.setFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Keep track of how long every button takes to run and whether it raised an error. The "
+        "statistics are shown in the Hotbox Manager, and can be printed from the W_hotbox menu."
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # profiling
+    knob = nuke.Boolean_Knob("hotboxProfileButtons", "Profile buttons")
+    knob.setValue(False)
+    knob.clearFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Run every button under cProfile and print the functions that took the most time. A single "
+        "button can be profiled as well, by holding Ctrl+Shift while clicking it. Profiles are written "
+        "to ~/.nuke/W_hotbox_profiles."
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # tracing
+    knob = nuke.Boolean_Knob("hotboxTracing", "Trace launches")
+    knob.setValue(False)
+    knob.clearFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Record how long every phase of launching the hotbox and invoking a button takes. Export "
+        "the recording as a Chrome trace from 'Edit > W_hotbox > Tracing'."
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # memory diagnostics
+    knob = nuke.Boolean_Knob("hotboxMemoryDiagnostics", "Memory diagnostics")
+    knob.setValue(False)
+    knob.clearFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Print the memory and the amount of widgets in use every time the hotbox is launched or the "
+        "Hotbox Manager is opened. Both should stay flat over time. Python allocations are only "
+        "tracked when running Python 3, and slow down Nuke while enabled."
+    )
+
+    addToPreferences(knob, tooltip)
+
     # Rule/Class order
     knob = nuke.Enumeration_Knob(
         "hotboxRuleClassOrder", "Order", ["Class - Rule", "Rule - Class"]
@@ -1033,6 +2328,30 @@ def addPreferences():
 
     addToPreferences(knob, tooltip)
 
+    # painted buttons
+    knob = nuke.Boolean_Knob("hotboxPaintedButtons", "Paint buttons")
+    knob.setValue(False)
+    knob.clearFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Draw the buttons directly, instead of styling them with stylesheets. Hovering over a button "
+        "will be faster, but buttons will only support the basic rich text formatting."
+    )
+
+    addToPreferences(knob, tooltip)
+
+    # single canvas
+    knob = nuke.Boolean_Knob("hotboxSingleCanvas", "Single canvas")
+    knob.setValue(False)
+    knob.clearFlag(nuke.STARTLINE)
+
+    tooltip = (
+        "Draw the whole hotbox as a single widget, rather than creating a widget for every button. "
+        "Launching a hotbox containing a lot of buttons will be faster."
+    )
+
+    addToPreferences(knob, tooltip)
+
     # fontsize knob
     knob = nuke.Int_Knob("hotboxFontSize", "Font size")
     knob.setValue(8)
@@ -1241,6 +2560,83 @@ def getTileColor(node=None):
     return interfaceColor
 
 
+class ButtonStyle(object):
+    """
+    Fonts and colors used to draw the buttons, created once for the current preferences.
+    """
+
+    def __init__(self, painted):
+        self.painted = painted
+
+        self.font = QtGui.QFont(
+            preferencesNode.knob("UIFont").value(),
+            preferencesNode.knob("hotboxFontSize").value(),
+            QtGui.QFont.Bold,
+        )
+
+        self.selectionColorHex = getSelectionColor()
+        self.selectionColor = getQColor(self.selectionColorHex)
+        self.selectedBorderColor = getQColor("#000000")
+        self.textColor = getQColor("#eeeeee")
+
+        self.staticTexts = {}
+
+    def getStaticText(self, text):
+        """
+        Return a QStaticText for the (rich) text of a button, laid out to fit the button.
+        """
+
+        if text not in self.staticTexts:
+            staticText = QtGui.QStaticText(text)
+            staticText.setTextFormat(QtCore.Qt.RichText)
+            staticText.setTextWidth(101)
+            staticText.setTextOption(QtGui.QTextOption(QtCore.Qt.AlignCenter))
+            staticText.prepare(QtGui.QTransform(), self.font)
+
+            self.staticTexts[text] = staticText
+
+        return self.staticTexts[text]
+
+
+def getButtonStyle():
+    """
+    Return the ButtonStyle for the current preferences. A new one will only be created when any of the
+    relevant preferences changed.
+    """
+
+    global buttonStyle
+
+    key = tuple(
+        preferencesNode.knob(knob).value()
+        for knob in [
+            "UIFont",
+            "hotboxFontSize",
+            "hotboxColorDropdown",
+            "hotboxColorCustom",
+            "hotboxPaintedButtons",
+        ]
+    )
+
+    if buttonStyle is None or buttonStyle.key != key:
+        buttonStyle = ButtonStyle(
+            bool(preferencesNode.knob("hotboxPaintedButtons").value())
+        )
+        buttonStyle.key = key
+
+    return buttonStyle
+
+
+def getQColor(color):
+    """
+    Return a QColor for a color stored as a string (hex or name). QColors are cached.
+    """
+
+    if color not in qColors:
+        qColors[color] = QtGui.QColor(color)
+
+    return qColors[color]
+
+
 def getSelectionColor():
     """
     Return color to be used for the selected items of the hotbox.
@@ -1278,6 +2674,55 @@ def revealInBrowser(startFolder=False):
         subprocess.Popen(["xdg-open", path])
 
 
+def packRepository():
+    """
+    Pack a repository into a single file, to be used as an extra repository.
+    """
+
+    folder = nuke.getFilename(
+        "Select the repository to pack", default=getHotBoxLocation()
+    )
+    if not folder:
+        return
+
+    packPath = nuke.getFilename("Save pack as", "*" + W_hotboxPack.packExtension)
+    if not packPath:
+        return
+
+    if not packPath.endswith(W_hotboxPack.packExtension):
+        packPath += W_hotboxPack.packExtension
+
+    try:
+        amount = W_hotboxPack.packRepository(folder, packPath)
+    except (IOError, OSError) as error:
+        nuke.message("Couldn't write %s:\n%s" % (packPath, error))
+        return
+
+    nuke.message("Packed %s files into %s" % (amount, packPath))
+
+
+def exportTrace():
+    """
+    Save the recorded launch phases as a Chrome trace file.
+    """
+
+    if not W_hotboxTrace.events:
+        nuke.message(
+            "Nothing recorded. Enable 'Trace launches' in the preferences and launch the hotbox."
+        )
+        return
+
+    tracePath = nuke.getFilename("Save trace as", "*.json")
+    if not tracePath:
+        return
+
+    if not tracePath.endswith(".json"):
+        tracePath += ".json"
+
+    amount = W_hotboxTrace.export(tracePath)
+    nuke.message("Saved %s events to %s" % (amount, tracePath))
+
+
 def getFileBrowser():
     """
     Determine the name of the file browser on the current system.
@@ -1307,8 +2752,13 @@ def printError(error, path="", buttonName="", rule=False):
 
     # line number
     lineNumber = ""
+    # the script of a button is compiled using the path of the button file as its filename.
+    fileTags = ['  File "<']
+    if path:
+        fileTags.append('  File "%s"' % path)
+
     for index, line in enumerate(reversed(fullError)):
-        if line.startswith('  File "<'):
+        if any([line.startswith(fileTag) for fileTag in fileTags]):
             for i in line.split(","):
                 if i.startswith(" line "):
                     lineNumber = i
@@ -1327,7 +2777,7 @@ def printError(error, path="", buttonName="", rule=False):
         scriptFolderName = os.path.basename(scriptFolder)
 
         while len(scriptFolderName) == 3 and scriptFolderName.isdigit():
-            name = open(scriptFolder + "/_name.json").read()
+            name = W_hotboxCache.getName(scriptFolder)
             buttonName.insert(0, name)
             scriptFolder = os.path.dirname(scriptFolder)
             scriptFolderName = os.path.basename(scriptFolder)
@@ -1350,6 +2800,177 @@ def printError(error, path="", buttonName="", rule=False):
     nuke.tprint(hotboxError)
 
 
+def printRuleError(error, ruleFile):
+    """
+    Print an error raised by a rule.
+    """
+
+    ruleName = os.path.basename(os.path.dirname(ruleFile))
+    printError(error, ruleFile, buttonName=ruleName, rule=True)
+
+
+def reportSlowRule(ruleFile, duration, timing):
+    """
+    Report a rule that took longer to evaluate than the budget set in the preferences. When enabled,
+    rules that are too slow on average will be disabled.
+    """
+
+    budget = preferencesNode.knob("hotboxRuleBudget").value()
+    ruleFolder = os.path.dirname(ruleFile)
+
+    message = (
+        "\nW_HOTBOX RULE WARNING: %s took %.1f ms, exceeding the budget of %d ms "
+        "(average %.1f ms over the last %d evaluations)"
+        % (
+            os.path.basename(ruleFolder),
+            duration * 1000,
+            budget,
+            timing.average() * 1000,
+            len(timing.durations),
+        )
+    )
+
+    # rules are only disabled for this session, the repository might be shared with others
+    if (
+        preferencesNode.knob("hotboxRuleAutoDisable").value()
+        and len(timing.durations) >= 3
+        and timing.average() * 1000 > budget
+        and ruleFile not in W_hotboxRules.ruleEngine.disabled
+    ):
+        W_hotboxRules.ruleEngine.disabled.add(ruleFile)
+        message += "\nThe rule has been disabled for the rest of this session."
+
+    print(message)
+    nuke.tprint(message)
+
+
+def printRuleTimings():
+    """
+    Print how long the rules took to evaluate, slowest first.
+    """
+
+    lines = [
+        "\nW_HOTBOX RULE TIMINGS (ms):",
+        "average  slowest  over budget  evaluations  rule",
+    ]
+
+    for ruleFile, timing in W_hotboxRules.ruleEngine.slowestRules():
+        lines.append(
+            "%7.1f  %7.1f  %11d  %11d  %s"
+            % (
+                timing.average() * 1000,
+                timing.slowest * 1000,
+                timing.overBudget,
+                timing.count,
+                os.path.dirname(ruleFile),
+            )
+        )
+
+    nuke.tprint("\n".join(lines))
+
+
+def printPrefetchStatistics():
+    """
+    Print how often the work prefetched when hovering a button was ready in time.
+    """
+
+    statistics = W_hotboxPrefetch.prefetcher.statistics()
+
+    nuke.tprint(
+        "\nW_HOTBOX PREFETCH:\n"
+        "requested %(requested)i, ready %(hits)i, still running %(late)i, not requested %(misses)i\n"
+        "hit rate %(hitRate).0f%%, saved %(savedMs).1f ms"
+        % dict(
+            statistics,
+            hitRate=statistics["hitRate"] * 100,
+            savedMs=statistics["savedTime"] * 1000,
+        )
+    )
+
+
+def profilingRequested():
+    """
+    Return whether the button being invoked should be profiled.
+    """
+
+    if preferencesNode.knob("hotboxProfileButtons").value():
+        return True
+
+    modifiers = QtWidgets.QApplication.keyboardModifiers()
+
+    return bool(modifiers & QtCore.Qt.ControlModifier) and bool(
+        modifiers & QtCore.Qt.ShiftModifier
+    )
+
+
+def sampleMemory(label):
+    """
+    Print the memory in use, when memory diagnostics are enabled in the preferences.
+    """
+
+    if not preferencesNode.knob("hotboxMemoryDiagnostics").value():
+        memoryMonitor.stop()
+        return
+
+    memoryMonitor.start()
+
+    # widgets that are about to be deleted don't count as retained
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+
+    nuke.tprint(memoryMonitor.sample(label, QtWidgets.QApplication.allWidgets()))
+
+
+def printAllocations(amount=20):
+    """
+    Print the lines of code holding on to the most memory allocated since memory diagnostics were
+    enabled.
+    """
+
+    allocations = memoryMonitor.topAllocations(amount)
+
+    if not allocations:
+        nuke.tprint(
+            "\nW_HOTBOX ALLOCATIONS: not tracked, enable memory diagnostics in the preferences "
+            "(Python 3 only)"
+        )
+        return
+
+    nuke.tprint("\n".join(["\nW_HOTBOX ALLOCATIONS:"] + allocations))
+
+
+def printButtonStatistics(amount=20):
+    """
+    Print the statistics of the buttons that take the longest to run.
+    """
+
+    telemetryStore.flush()
+
+    statistics = sorted(
+        telemetryStore.statistics().items(),
+        key=lambda item: item[1].percentile95,
+        reverse=True,
+    )
+
+    lines = [
+        "\nW_HOTBOX BUTTON STATISTICS (ms):",
+        "    p50      p95  invocations  errors  button",
+    ]
+
+    for path, buttonStatistics in statistics[:amount]:
+        lines.append(
+            "%7.1f  %7.1f  %11d  %5.0f%%  %s"
+            % (
+                buttonStatistics.median * 1000,
+                buttonStatistics.percentile95 * 1000,
+                buttonStatistics.count,
+                buttonStatistics.errorRate() * 100,
+                path,
+            )
+        )
+
+    nuke.tprint("\n".join(lines))
+
+
 # - launch hotbox
 
 
@@ -1371,16 +2992,30 @@ def showHotbox(force=False, resetPosition=True):
         lastPosition = ""
 
     if hotboxInstance == None or not hotboxInstance.active:
-        hotboxInstance = Hotbox(position=lastPosition)
-        hotboxInstance.show()
+        W_hotboxTrace.setEnabled(preferencesNode.knob("hotboxTracing").value())
+
+        sampleMemory("launch")
+
+        with W_hotboxTrace.span("showHotbox"):
+            updateCatalogWatcher()
+            updateMirrors()
+            updateRepositoryLoads()
+            hotboxInstance = hotboxPool.getHotbox(position=lastPosition)
+            hotboxInstance.show()
 
 
 def showHotboxSubMenu(path, name):
     global hotboxInstance
+
+    W_hotboxPrefetch.prefetcher.claim(("folder", path))
+
     hotboxInstance.active = False
     if hotboxInstance == None or not hotboxInstance.active:
-        hotboxInstance = Hotbox(True, path, name)
-        hotboxInstance.show()
+        with W_hotboxTrace.span("showHotboxSubMenu", path=path):
+            hotboxInstance = hotboxPool.getHotbox(
+                True, path, name, context=hotboxInstance.context
+            )
+            hotboxInstance.show()
 
 
 def showHotboxManager():
@@ -1407,6 +3042,13 @@ def addMenuItems():
     editMenu.addCommand("W_hotbox/Open in %s" % getFileBrowser(), revealInBrowser)
     editMenu.addCommand("W_hotbox/-", "", "")
     editMenu.addCommand("W_hotbox/Repair", "W_hotboxManager.repairHotbox()")
+    editMenu.addCommand("W_hotbox/Print Rule Timings", printRuleTimings)
+    editMenu.addCommand("W_hotbox/Print Prefetch Statistics", printPrefetchStatistics)
+    editMenu.addCommand("W_hotbox/Print Button Statistics", printButtonStatistics)
+    editMenu.addCommand("W_hotbox/Tracing/Export Trace...", exportTrace)
+    editMenu.addCommand("W_hotbox/Tracing/Clear Trace", W_hotboxTrace.clear)
+    editMenu.addCommand("W_hotbox/Memory/Print Allocations", printAllocations)
+    editMenu.addCommand("W_hotbox/Special/Pack Repository...", packRepository)
     editMenu.addCommand(
         "W_hotbox/Clear/Clear Everything", "W_hotboxManager.clearHotboxManager()"
     )
@@ -1446,6 +3088,7 @@ def resetMenuItems():
 # add knobs to preferences
 preferencesNode = nuke.toNode("preferences")
 homeFolder = os.getenv("HOME").replace("\\", "/") + "/.nuke"
+mirrorFolder = homeFolder + "/W_hotbox_cache"
 
 updatePreferences()
 addPreferences()
@@ -1516,6 +3159,10 @@ if "W_HOTBOX_REPO_PATHS" in os.environ and "W_HOTBOX_REPO_NAMES" in os.environ.k
     if len(extraRepositories) > 0:
         editMenu.addCommand("W_hotbox/-", "", "")
         for repo in extraRepositories:
+            # packed repositories are read only
+            if W_hotboxPack.isPacked(repo[1]):
+                continue
+
             editMenu.addCommand(
                 "W_hotbox/Special/Open Hotbox Manager - {}".format(repo[0]),
                 'W_hotboxManager.showHotboxManager(path="{}")'.format(repo[1]),
@@ -1525,6 +3172,40 @@ if "W_HOTBOX_REPO_PATHS" in os.environ and "W_HOTBOX_REPO_NAMES" in os.environ.k
 hotboxInstance = None
 lastPosition = ""
 
+buttonStyle = None
+qColors = {}
+
+buttonPool = HotboxButtonPool()
+hotboxPool = HotboxPool()
+
+catalogWatcher = None
+
+# folders the extra repositories are read from, when they differ from the original location
+repositoryPaths = {}
+
+# extra repositories are loaded in the background, results are picked up while any load is running
+repositoryLoader = W_hotboxLoader.RepositoryLoader()
+W_hotboxRules.ruleEngine.loader = repositoryLoader
+
+# memory in use at every launch, when enabled in the preferences
+memoryMonitor = W_hotboxMemory.MemoryMonitor()
+
+# profiles of buttons, written when invoked with profiling enabled
+profileFolder = homeFolder + "/W_hotbox_profiles"
+
+# invocations of buttons, written in the background
+telemetryStore = W_hotboxTelemetry.TelemetryStore(homeFolder + "/W_hotbox_telemetry.db")
+
+repositoryTimer = QtCore.QTimer()
+repositoryTimer.setInterval(50)
+repositoryTimer.timeout.connect(collectRepositoryLoads)
+
+# build a hotbox in advance, as soon as the interface is up and running.
+if nuke.GUI:
+    updateMirrors()
+    updateRepositoryLoads()
+    QtCore.QTimer.singleShot(0, hotboxPool.prewarm)
+
 
 nuke.tprint(
     "W_hotbox v{}, built {}.\nCopyright (c) 2016-{} Wouter Gilsing. All Rights Reserved.".format(
@@ -0,0 +1,461 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox cache
+#
+# Cache for the information stored in the files of a hotbox repository. Both the hotbox and the manager
+# read the header of a button file ('# NAME: ', '# COLOR: ', etc.) and the name of a submenu ('_name.json')
+# over and over again. Entries are validated against the modification time and size of the file, so an
+# unchanged file only costs a stat call.
+#
+# Showing a button only requires the header of its file. The script itself is read when the button gets
+# invoked, and only kept around in its compiled form (see CodeCache).
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import stat
+import marshal
+import hashlib
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+import W_hotboxPack
+
+try:
+    from importlib.util import MAGIC_NUMBER
+except ImportError:
+    from imp import get_magic
+
+    MAGIC_NUMBER = get_magic()
+
+# replaces an existing file atomically. Python 2 lacks os.replace, its os.rename does the same on posix.
+replaceFile = getattr(os, "replace", os.rename)
+
+
+class ButtonFileInfo(object):
+    """
+    Parsed content of a button file.
+    """
+
+    def __init__(self, path, content):
+        self.path = path
+        self.tags = {}
+        self.body = None
+        self.bodyOffset = len(content)
+        self.headerLines = 0
+
+        lines = content.splitlines(True)
+
+        offset = 0
+        for line in lines:
+            # no point in checking beyond the header
+            if not line.startswith("#"):
+                self.body = content[offset:]
+                self.bodyOffset = offset
+                break
+
+            offset += len(line)
+            self.headerLines += 1
+
+            # '# TAG: value'
+            if line.startswith("# ") and ": " in line:
+                tag, value = line[2:].split(": ", 1)
+                if tag not in self.tags:
+                    self.tags[tag] = value.replace("\n", "")
+
+    def getAttribute(self, attribute="name"):
+        """
+        Return the value of a header tag, or None if the tag wasn't found.
+        """
+        return self.tags.get(attribute.upper())
+
+    def getScript(self):
+        """
+        Return the script the way it's shown in the manager's script editor, without the empty line
+        that separates the header from the script.
+        """
+
+        if self.body is None:
+            return None
+
+        return self.body.partition("\n")[2].replace("\t", " " * 4)
+
+
+class ButtonHeader(ButtonFileInfo):
+    """
+    Parsed header of a button file, without the script.
+    """
+
+    def __init__(self, path, content):
+        super(ButtonHeader, self).__init__(path, content)
+        self.body = None
+
+
+class FileCache(object):
+    """
+    Least recently used cache of parsed files, validated by modification time and file size.
+    """
+
+    def __init__(self, maxSize=4096):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self, path):
+        """
+        Return (mtime, size, isFile) of a path, or None if it doesn't exist.
+        """
+
+        if W_hotboxPack.isPacked(path):
+            return W_hotboxPack.signature(path)
+
+        try:
+            fileStat = os.stat(path)
+        except OSError:
+            return None
+
+        mtime = getattr(fileStat, "st_mtime_ns", fileStat.st_mtime)
+        return (mtime, fileStat.st_size, stat.S_ISREG(fileStat.st_mode))
+
+    def get(self, path, parser, signature=None, reader=None):
+        """
+        Return the parsed content of a file. The file will only be read and parsed by the parser
+        (a callable taking the path and content of the file) if it changed since it was last cached.
+        Reader is the callable used to read the file, defaulting to reading the whole file.
+        """
+
+        if signature is None:
+            signature = self.signature(path)
+
+        if signature is None:
+            return None
+
+        key = (path, parser)
+
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None and entry[0] == signature:
+                self.entries[key] = entry
+                self.hits += 1
+                return entry[1]
+
+        result = parser(path, (reader or readFile)(path))
+
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = (signature, result)
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+        return result
+
+    def invalidate(self, path=None):
+        """
+        Remove a file (or every file inside a folder) from the cache. Clear the cache if no path given.
+        """
+
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+                return
+
+            path = path.replace("\\", "/").rstrip("/")
+            for key in list(self.entries.keys()):
+                if key[0] == path or key[0].startswith(path + "/"):
+                    del self.entries[key]
+
+    def statistics(self):
+        """
+        Return a dictionary describing how well the cache performed so far.
+        """
+
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class CodeCache(object):
+    """
+    Cache of compiled button scripts. Scripts are compiled with the path of the button file as their
+    filename, padded with empty lines in place of the header, so tracebacks point at the actual file and
+    line. Optionally the compiled code gets marshalled to a folder on disk, to be shared between sessions.
+    """
+
+    def __init__(self, maxSize=512):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.strings = {}
+        self.lock = threading.Lock()
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+        self.diskHits = 0
+
+    def getCode(self, path, diskFolder=None):
+        """
+        Return the compiled script of a button file. Raises SyntaxError if the script can't be compiled.
+        """
+
+        signature = fileCache.signature(path)
+        if signature is None:
+            raise IOError("No such file: '%s'" % path)
+
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry is not None and entry[0] == signature:
+                self.entries[path] = entry
+                self.hits += 1
+                return entry[1]
+
+        # packed repositories are read only
+        if diskFolder and W_hotboxPack.isPacked(diskFolder):
+            diskFolder = None
+
+        code = None
+        if diskFolder:
+            code = self.loadCode(path, signature, diskFolder)
+
+        if code is None:
+            # the script is only needed to compile it, so it doesn't go into the file cache
+            info = ButtonFileInfo(path, readFile(path))
+            source = "\n" * info.headerLines + (info.body or "")
+            code = compile(source, path, "exec")
+
+            if diskFolder:
+                self.saveCode(path, signature, diskFolder, code)
+
+        with self.lock:
+            self.misses += 1
+            self.entries[path] = (signature, code)
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+        return code
+
+    def compileString(self, source):
+        """
+        Return the compiled version of a script that isn't stored in a file.
+        """
+
+        code = self.strings.get(source)
+        if code is None:
+            code = compile(source, "<string>", "exec")
+            self.strings[source] = code
+
+        return code
+
+    # --------------------------------------------------------------------------------------------------
+    # disk
+    # --------------------------------------------------------------------------------------------------
+
+    def diskPath(self, path, diskFolder):
+        return "%s/%s.marshal" % (
+            diskFolder,
+            hashlib.sha1(path.encode("utf-8")).hexdigest(),
+        )
+
+    def diskHeader(self, signature):
+        return MAGIC_NUMBER + ("%s %s\n" % signature[:2]).encode("utf-8")
+
+    def loadCode(self, path, signature, diskFolder):
+        """
+        Read compiled code from disk. Return None if not available or outdated.
+        """
+
+        try:
+            with open(self.diskPath(path, diskFolder), "rb") as cacheFile:
+                data = cacheFile.read()
+        except (IOError, OSError):
+            return None
+
+        header = self.diskHeader(signature)
+        if not data.startswith(header):
+            return None
+
+        try:
+            code = marshal.loads(data[len(header) :])
+        except (ValueError, EOFError, TypeError):
+            return None
+
+        self.diskHits += 1
+        return code
+
+    def saveCode(self, path, signature, diskFolder, code):
+        """
+        Write compiled code to disk. Failing to do so (read only repository, another session replacing
+        the same file at the same moment) isn't considered an error.
+        """
+
+        tmpPath = None
+
+        try:
+            if not os.path.isdir(diskFolder):
+                os.makedirs(diskFolder)
+
+            fileDescriptor, tmpPath = tempfile.mkstemp(dir=diskFolder)
+            with os.fdopen(fileDescriptor, "wb") as cacheFile:
+                cacheFile.write(self.diskHeader(signature) + marshal.dumps(code))
+
+            replaceFile(tmpPath, self.diskPath(path, diskFolder))
+
+        except (IOError, OSError):
+            if tmpPath is not None and os.path.exists(tmpPath):
+                try:
+                    os.remove(tmpPath)
+                except OSError:
+                    pass
+
+    def invalidate(self, path=None):
+        """
+        Remove a file (or every file inside a folder) from the cache. Clear the cache if no path given.
+        """
+
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+                return
+
+            path = path.replace("\\", "/").rstrip("/")
+            for key in list(self.entries.keys()):
+                if key == path or key.startswith(path + "/"):
+                    del self.entries[key]
+
+    def statistics(self):
+        """
+        Return a dictionary describing how well the cache performed so far.
+        """
+
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "diskHits": self.diskHits,
+        }
+
+
+def parseName(path, content):
+    return content
+
+
+def readFile(path):
+    """
+    Return the content of a file, which might be stored inside a packed repository.
+    """
+
+    if W_hotboxPack.isPacked(path):
+        return W_hotboxPack.read(path)
+
+    with open(path) as openFile:
+        return openFile.read()
+
+
+def readHeader(path):
+    """
+    Return the header of a button file, followed by the first line of its script.
+    """
+
+    if W_hotboxPack.isPacked(path):
+        return W_hotboxPack.read(path)
+
+    lines = []
+
+    with open(path) as openFile:
+        for line in openFile:
+            lines.append(line)
+            if not line.startswith("#"):
+                break
+
+    return "".join(lines)
+
+
+def isFolder(path):
+    """
+    Check whether a path is a folder, which might be stored inside a packed repository.
+    """
+
+    if W_hotboxPack.isPacked(path):
+        return W_hotboxPack.isFolder(path)
+
+    return os.path.isdir(path)
+
+
+# - shared cache used by both the hotbox and the manager
+
+fileCache = FileCache()
+codeCache = CodeCache()
+
+
+def getFileInfo(path):
+    """
+    Return a ButtonFileInfo for a button file, or None if the path isn't a file.
+    """
+
+    signature = fileCache.signature(path)
+    if signature is None or not signature[2]:
+        return None
+
+    return fileCache.get(path, ButtonFileInfo, signature)
+
+
+def getHeader(path):
+    """
+    Return a ButtonHeader for a button file, or None if the path isn't a file. Only the header of the
+    file is read.
+    """
+
+    signature = fileCache.signature(path)
+    if signature is None or not signature[2]:
+        return None
+
+    return fileCache.get(path, ButtonHeader, signature, readHeader)
+
+
+def getName(folder):
+    """
+    Return the name of a submenu, as stored in its '_name.json' file.
+    """
+
+    nameFile = folder + "/_name.json"
+
+    signature = fileCache.signature(nameFile)
+    if signature is None or not signature[2]:
+        return None
+
+    return fileCache.get(nameFile, parseName, signature)
+
+
+def getAttribute(path, attribute="name"):
+    """
+    Return the value of a header tag of a button file. For folders the name of the submenu will be
+    returned when asked for its name. If no attribute found, return None.
+    """
+
+    info = getHeader(path)
+
+    if info is not None:
+        return info.getAttribute(attribute)
+
+    if attribute == "name":
+        return getName(path)
+
+    return None
+
+
+def getScript(path):
+    """
+    Return the script stored in a button file, or None if the path isn't a file.
+    """
+
+    info = getFileInfo(path)
+
+    if info is not None:
+        return info.getScript()
+
+    return None
@@ -0,0 +1,481 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox catalog
+#
+# In-memory index of the folders that make up a hotbox repository. Every folder is listed once and only
+# listed again when its modification time changes, so launching the hotbox on an unchanged repository
+# boils down to a handful of stat calls and dictionary lookups.
+#
+# When a watcher is installed (see setWatcher), folders are watched for changes instead. Listings of
+# watched folders are trusted until the watcher reports a change, or until they weren't checked for
+# pollInterval seconds, which covers network mounts that don't report every change. Missing folders
+# can't be watched, so they are still checked every time.
+#
+# Catalogs of repositories loaded in the background (see W_hotboxLoader) are kept up to date by the
+# loader instead. Their listings are trusted without touching the disk at all.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import time
+
+from collections import OrderedDict
+
+import W_hotboxPack
+
+
+class CatalogFolder(object):
+    """
+    Cached listing of a single folder on disk.
+    """
+
+    def __init__(self, path, mtime, entries):
+        self.path = path
+        self.mtime = mtime
+        self.entries = entries
+        self.entrySet = frozenset(entries)
+
+        # last time the folder was confirmed to be up to date
+        self.checked = time.time()
+
+        # derived data, filled in lazily by the catalog
+        self.derived = {}
+
+
+class RepositoryCatalog(object):
+    """
+    Index of a single repository (the folder containing 'Single', 'Multiple', 'All' and 'Rules').
+    """
+
+    def __init__(self, root):
+        root = root.replace("\\", "/")
+        if root[-1] != "/":
+            root += "/"
+
+        self.root = root
+
+        self.folders = {}
+
+        # packed repositories are read from a single file, which keeps track of changes itself
+        self.packed = W_hotboxPack.isPacked(root)
+
+        # whether the folders of this repository are watched for changes
+        self.watched = watcher is not None and not self.packed
+        self.pollInterval = 30.0
+
+        # whether the listings are provided by a background loader (see update)
+        self.background = False
+
+        # revision gets incremented every time a folder had to be (re)listed, which allows other caches
+        # to find out whether anything changed since they last consulted the catalog.
+        self.revision = 0
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+        self.listTime = 0.0
+
+    # --------------------------------------------------------------------------------------------------
+    # folders
+    # --------------------------------------------------------------------------------------------------
+
+    def getFolder(self, path):
+        """
+        Return the CatalogFolder for path, relisting it if it was modified since it was last indexed.
+        """
+
+        folder = self.folders.get(path)
+
+        # watched folders don't have to be checked, unless the last check was too long ago. Folders
+        # that didn't exist can't be watched, they're checked every time.
+        if folder is not None and (
+            self.background
+            or (
+                self.watched
+                and folder.mtime is not None
+                and time.time() - folder.checked < self.pollInterval
+            )
+        ):
+            self.hits += 1
+            return folder
+
+        if self.packed:
+            signature = W_hotboxPack.signature(path)
+            mtime = signature[0] if signature else None
+
+        else:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                mtime = None
+
+        if folder is not None and folder.mtime == mtime:
+            folder.checked = time.time()
+            self.hits += 1
+            return folder
+
+        startTime = time.time()
+
+        entries = []
+        if self.packed:
+            entries = W_hotboxPack.listFolder(path) or []
+
+        elif mtime is not None:
+            try:
+                entries = sorted(os.listdir(path))
+            except OSError:
+                entries = []
+
+        folder = CatalogFolder(path, mtime, entries)
+        self.folders[path] = folder
+
+        # fall back to checking the modification time when the folder can't be watched
+        if self.watched and mtime is not None and not watcher.watch(path):
+            self.watched = False
+
+        self.listTime += time.time() - startTime
+        self.misses += 1
+        self.revision += 1
+
+        return folder
+
+    def listFolder(self, path):
+        """
+        Return the sorted content of a folder.
+        """
+        return self.getFolder(path).entries
+
+    def update(self, listings):
+        """
+        Take over the listings of a background load, a dictionary of {path: (mtime, entries)}. Folders
+        that didn't change keep their derived data. Returns whether anything changed.
+        """
+
+        folders = {}
+        changed = False
+
+        for path, (mtime, entries) in listings.items():
+            folder = self.folders.get(path)
+
+            if folder is None or folder.mtime != mtime or folder.entries != entries:
+                folder = CatalogFolder(path, mtime, entries)
+                changed = True
+
+            folders[path] = folder
+
+        # folders that no longer exist
+        for path, folder in self.folders.items():
+            if path not in folders:
+                if folder.mtime is not None:
+                    changed = True
+                else:
+                    folders[path] = folder
+
+        self.folders = folders
+
+        if changed:
+            self.revision += 1
+
+        return changed
+
+    def invalidate(self, path=None, recursive=True):
+        """
+        Forget the listing of a folder (and everything underneath it, unless recursive is False), or
+        the whole catalog if no path was given.
+        """
+
+        if path is None:
+            self.folders = {}
+        else:
+            path = path.replace("\\", "/").rstrip("/")
+
+            if not recursive:
+                self.folders.pop(path, None)
+
+            else:
+                for folderPath in list(self.folders.keys()):
+                    if folderPath == path or folderPath.startswith(path + "/"):
+                        del self.folders[folderPath]
+
+        self.revision += 1
+
+    # --------------------------------------------------------------------------------------------------
+    # lookups
+    # --------------------------------------------------------------------------------------------------
+
+    def classFolder(self, nodeClass):
+        """
+        Return the path of the 'Single' folder of a nodeclass, or None if there is no such folder.
+        """
+
+        if nodeClass in self.getFolder(self.root + "Single").entrySet:
+            return self.root + "Single/" + nodeClass
+
+        return None
+
+    def combinations(self):
+        """
+        Return a list of (folder path, list of classes) for every class combination in 'Multiple'.
+        """
+
+        folder = self.getFolder(self.root + "Multiple")
+
+        if "combinations" not in folder.derived:
+            folder.derived["combinations"] = [
+                (folder.path + "/" + name, name.split("-"))
+                for name in folder.entries
+                if name[0] not in ["_", "."]
+            ]
+
+        return folder.derived["combinations"]
+
+    def combinationIndex(self):
+        """
+        Return a dictionary mapping every nodeclass to the set of indices (into combinations()) of the
+        class combinations containing that class.
+        """
+
+        folder = self.getFolder(self.root + "Multiple")
+
+        if "combinationIndex" not in folder.derived:
+            index = {}
+            for combinationIndex, combination in enumerate(self.combinations()):
+                for nodeClass in combination[1]:
+                    index.setdefault(nodeClass, set()).add(combinationIndex)
+
+            folder.derived["combinationIndex"] = index
+
+        return folder.derived["combinationIndex"]
+
+    def matchCombinations(self, nodeClasses):
+        """
+        Return the paths of the class combinations in 'Multiple' that contain all of the given classes,
+        in the order they are stored on disk.
+        """
+
+        index = self.combinationIndex()
+
+        candidates = None
+
+        # intersect the smallest sets first, to touch as few combinations as possible
+        for nodeClass in sorted(set(nodeClasses), key=lambda i: len(index.get(i, ()))):
+            combinationIndices = index.get(nodeClass)
+            if not combinationIndices:
+                return []
+
+            if candidates is None:
+                candidates = set(combinationIndices)
+            else:
+                candidates &= combinationIndices
+
+            if not candidates:
+                return []
+
+        if candidates is None:
+            return []
+
+        combinations = self.combinations()
+        return [combinations[i][0] for i in sorted(candidates)]
+
+    def rules(self):
+        """
+        Return a list of (rule folder, rule file) for every enabled rule of the repository. A rule
+        folder holds either a '_rule.py' or a '_rule.json' file.
+        """
+
+        rulesFolder = self.root + "Rules"
+        folder = self.getFolder(rulesFolder)
+
+        allRules = []
+        for rule in folder.entries:
+            if rule[0] in ["_", "."] or rule[-1] == "_":
+                continue
+
+            rulePath = "/".join([rulesFolder, rule])
+            ruleFile = self.ruleFile(rulePath)
+            if ruleFile:
+                allRules.append((rulePath, ruleFile))
+
+        return allRules
+
+    def ruleFile(self, rulePath):
+        """
+        Return the path of the file defining a rule, or None if the folder doesn't contain one.
+        """
+
+        entries = self.getFolder(rulePath).entrySet
+
+        for fileName in ["_rule.py", "_rule.json"]:
+            if fileName in entries:
+                return rulePath + "/" + fileName
+
+        return None
+
+    def items(self, path):
+        """
+        Return the paths of the buttons (###.py) and submenus (###) stored in a folder.
+        """
+
+        folder = self.getFolder(path)
+
+        if "items" not in folder.derived:
+            folder.derived["items"] = [
+                "/".join([path, file])
+                for file in folder.entries
+                if file[0] not in [".", "_"] and len(file) in [3, 6]
+            ]
+
+        return folder.derived["items"]
+
+    def statistics(self):
+        """
+        Return a dictionary describing how well the catalog performed so far.
+        """
+
+        return {
+            "root": self.root,
+            "folders": len(self.folders),
+            "hits": self.hits,
+            "misses": self.misses,
+            "listTime": self.listTime,
+            "revision": self.revision,
+        }
+
+
+class ItemsMemo(object):
+    """
+    Memo of the items resolved for a given selection. Every entry keeps track of the catalog folders it
+    was based on, and is discarded as soon as one of those folders had to be relisted.
+    """
+
+    def __init__(self, maxSize=64):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the value stored for key, or None if there is no valid entry.
+        """
+
+        entry = self.entries.pop(key, None)
+
+        if entry is not None:
+            value, dependencies = entry
+
+            for catalog, folder in dependencies:
+                if catalog.getFolder(folder.path) is not folder:
+                    entry = None
+                    break
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries[key] = entry
+        self.hits += 1
+        return value
+
+    def store(self, key, value, folders):
+        """
+        Store value for key. Folders is a list of the paths the value was derived from.
+        """
+
+        dependencies = []
+        for path in folders:
+            catalog = findCatalog(path)
+            dependencies.append((catalog, catalog.getFolder(path)))
+
+        self.entries[key] = (value, dependencies)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def statistics(self):
+        """
+        Return a dictionary describing how well the memo performed so far.
+        """
+
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# - catalog registry
+
+catalogs = {}
+itemsMemo = ItemsMemo()
+
+# object watching folders for changes, having a watch(path) method returning whether it succeeded
+watcher = None
+
+
+def setWatcher(folderWatcher):
+    """
+    Install (or remove, when None) the object watching the folders of the catalogs for changes.
+    """
+
+    global watcher
+    watcher = folderWatcher
+
+    for catalog in catalogs.values():
+        catalog.invalidate()
+        catalog.watched = watcher is not None and not catalog.packed
+
+
+def getCatalog(root):
+    """
+    Return the catalog of a repository, create it if it doesn't exist yet.
+    """
+
+    root = root.replace("\\", "/")
+    if root[-1] != "/":
+        root += "/"
+
+    if root not in catalogs:
+        catalogs[root] = RepositoryCatalog(root)
+
+    return catalogs[root]
+
+
+def findCatalog(path):
+    """
+    Return the catalog of the repository a path belongs to. If the path isn't part of a known
+    repository, a catalog will be created for the folder it lives in.
+    """
+
+    path = path.replace("\\", "/")
+
+    roots = [root for root in catalogs.keys() if path.startswith(root)]
+    if roots:
+        return catalogs[max(roots, key=len)]
+
+    return getCatalog(os.path.dirname(path.rstrip("/")))
+
+
+def invalidateCatalogs(path=None, recursive=True):
+    """
+    Invalidate every catalog, or only the listings of the folder a path points to (and everything
+    underneath it, unless recursive is False).
+    """
+
+    itemsMemo.clear()
+
+    for catalog in catalogs.values():
+        if path is None:
+            catalog.invalidate()
+        elif (path.replace("\\", "/").rstrip("/") + "/").startswith(catalog.root):
+            catalog.invalidate(path, recursive)
+
+
+def catalogRevision():
+    """
+    Return a value that changes whenever any of the catalogs was modified.
+    """
+
+    return tuple(sorted((root, catalog.revision) for root, catalog in catalogs.items()))
@@ -0,0 +1,203 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox layout
+#
+# The geometry of the hotbox, free of Qt and nuke. Buttons are devided over rows, every row holding
+# 'step size' more buttons than the previous one, which gives the hotbox its triangular shape. The
+# rows only depend on the amount of buttons and a handful of preferences, so they are computed once
+# and reused for every launch showing the same amount of buttons.
+# ----------------------------------------------------------------------------------------------------------
+
+from collections import OrderedDict
+
+
+class RowLayout(object):
+    """
+    A block of rows for a given amount of items. Rows are stored as lists of indices into the item list,
+    in the order they appear on screen.
+    """
+
+    def __init__(
+        self, count, rowMaxAmount, stepSize=1, spawnToSides=True, mirrored=True
+    ):
+        self.count = count
+
+        # - devide in rows based on the row maximum
+        allRows = []
+        row = []
+
+        for index in range(count):
+            if spawnToSides:
+                if len(row) % 2:
+                    row.append(index)
+                else:
+                    row.insert(0, index)
+            else:
+                row.append(index)
+
+            # when a row reaches its full capacity, add the row to the allRows list
+            # and start a new one. Increase rowcapacity to get a triangular shape
+            if len(row) == rowMaxAmount:
+                allRows.append(row)
+                row = []
+                rowMaxAmount += stepSize
+
+        # if the last row is not completely full, add it to the allRows list anyway
+        if len(row) != 0:
+            allRows.append(row)
+
+        if not mirrored:
+            allRows.reverse()
+
+        self.rows = allRows
+
+    def apply(self, items):
+        """
+        Return the rows filled with the actual items.
+        """
+        return [[items[index] for index in row] for row in self.rows]
+
+
+class LayoutEngine(object):
+    """
+    Creates the row layouts and keeps the most recently used ones around.
+    """
+
+    def __init__(
+        self, buttonWidth=105, buttonHeight=35, spacing=6, margin=11, maxSize=64
+    ):
+        self.buttonWidth = buttonWidth
+        self.buttonHeight = buttonHeight
+        self.spacing = spacing
+        self.margin = margin
+
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+
+    def rowLayout(
+        self, count, rowMaxAmount, stepSize=1, spawnToSides=True, mirrored=True
+    ):
+        """
+        Return the RowLayout for an amount of items and the given preferences.
+        """
+
+        key = (count, rowMaxAmount, stepSize, bool(spawnToSides), bool(mirrored))
+
+        layout = self.entries.pop(key, None)
+
+        if layout is None:
+            layout = RowLayout(count, rowMaxAmount, stepSize, spawnToSides, mirrored)
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        self.entries[key] = layout
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+        return layout
+
+    def rows(self, items, rowMaxAmount, stepSize=1, spawnToSides=True, mirrored=True):
+        """
+        Return the items devided over rows.
+        """
+
+        return self.rowLayout(
+            len(items), rowMaxAmount, stepSize, spawnToSides, mirrored
+        ).apply(items)
+
+    def padding(self, topRowAmount, bottomRowAmount):
+        """
+        Return the amount of empty rows to be added to the top and bottom, to make sure the center row
+        ends up in the center of the hotbox.
+        """
+
+        difference = topRowAmount - bottomRowAmount
+        return max(0, -difference), max(0, difference)
+
+    def placeRows(self, rows, centerRowIndex, sectionSpacing, itemSize=None):
+        """
+        Position the rows of a complete hotbox. Rows are lists of items, and numbers for a horizontal gap
+        of that width. itemSize is a callable returning the (width, height) of an item, defaulting to
+        the size of a button. Returns the width and height of the hotbox and a list of
+        (top, bottom, [(x, y, width, height, item), ...]) for every row that isn't empty.
+        """
+
+        if itemSize is None:
+            itemSize = lambda item: (self.buttonWidth, self.buttonHeight)
+
+        def rowWidth(row):
+            width = 0
+            for index, item in enumerate(row):
+                if isinstance(item, int):
+                    width += item
+                    continue
+
+                if index and not isinstance(row[index - 1], int):
+                    width += self.spacing
+                width += itemSize(item)[0]
+
+            return width
+
+        totalWidth = max([rowWidth(row) for row in rows] + [0]) + 2 * self.margin
+
+        placedRows = []
+
+        top = self.margin
+
+        for rowIndex, row in enumerate(rows):
+            if rowIndex == centerRowIndex:
+                top += sectionSpacing
+
+            sizes = [itemSize(item) for item in row if not isinstance(item, int)]
+            rowHeight = max([size[1] for size in sizes] + [self.buttonHeight])
+
+            left = (totalWidth - rowWidth(row)) // 2
+
+            placedItems = []
+
+            for index, item in enumerate(row):
+                if isinstance(item, int):
+                    left += item
+                    continue
+
+                if index and not isinstance(row[index - 1], int):
+                    left += self.spacing
+
+                width, height = itemSize(item)
+                placedItems.append(
+                    (left, top + (rowHeight - height) // 2, width, height, item)
+                )
+
+                left += width
+
+            if placedItems:
+                placedRows.append((top, top + rowHeight, placedItems))
+
+            top += rowHeight + self.spacing
+
+            if rowIndex == centerRowIndex:
+                top += sectionSpacing
+
+        totalHeight = top - self.spacing + self.margin
+
+        return totalWidth, totalHeight, placedRows
+
+    def statistics(self):
+        """
+        Return a dictionary describing how well the cache performed so far.
+        """
+
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# - shared engine
+
+layoutEngine = LayoutEngine()
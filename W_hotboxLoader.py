@@ -0,0 +1,322 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox loader
+#
+# Loads repositories in the background. Every repository gets a worker thread of its own, which lists all
+# of its folders and parses its rules, button headers and submenu names. The listings are handed back to
+# the main thread (see collect), which feeds them to the catalog of the repository. The parsed files are
+# kept by the load, the hotbox reads them from there (see getHeader, getName and getRule) instead of
+# touching the repository itself. When the manager changes a repository, its files are read from disk
+# again until it got loaded once more (see invalidate).
+#
+# A repository is left out of the hotbox until it was loaded once, and while loading it again takes
+# longer than the timeout. A network mount that stopped responding only ever blocks its own worker.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import time
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import W_hotboxCache
+import W_hotboxRules
+
+
+class RepositoryLoad(object):
+    """
+    State of the background loading of a single repository.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.path = root.replace("\\", "/").rstrip("/") + "/"
+
+        self.thread = None
+        self.started = 0.0
+        self.finished = 0.0
+
+        # {folder path: (mtime, entries)} of the last load that succeeded, None until then
+        self.folders = None
+
+        # {file path: parsed content} of the rules, button headers and submenu names of that load
+        self.files = {}
+
+        # when the load the folders and files are taken from started, and when the repository was last
+        # changed by the manager
+        self.scanned = 0.0
+        self.invalidated = None
+
+        self.error = None
+
+        # statistics
+        self.loads = 0
+        self.loadTime = 0.0
+
+    def isLoading(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def isStale(self):
+        """
+        Check whether the repository changed since the folders and files were loaded.
+        """
+        return self.invalidated is not None and self.invalidated >= self.scanned
+
+
+class RepositoryLoader(object):
+    """
+    Loads repositories on worker threads. Loading a repository again is skipped when it was loaded less
+    than refreshInterval seconds ago. Loads taking longer than timeout seconds make the repository
+    unavailable until they finish.
+    """
+
+    timeout = 2.0
+
+    # every load walks the whole repository, which is only worth it once in a while
+    refreshInterval = 60.0
+
+    def __init__(self):
+        self.loads = {}
+        self.results = queue.Queue()
+
+        # incremented whenever the files of a repository changed
+        self.revision = 0
+
+    def start(self, root):
+        """
+        Start loading a repository, unless it's already being loaded or was loaded recently.
+        """
+
+        load = self.loads.get(root)
+        if load is None:
+            load = self.loads[root] = RepositoryLoad(root)
+
+        if load.isLoading():
+            return
+
+        if (
+            load.folders is not None
+            and not load.isStale()
+            and time.time() - load.finished < self.refreshInterval
+        ):
+            return
+
+        load.started = time.time()
+
+        load.thread = threading.Thread(target=self.run, args=(load,))
+        load.thread.daemon = True
+        load.thread.start()
+
+    def run(self, load):
+        """
+        Load a repository. Runs on the worker thread of the repository.
+        """
+
+        startTime = time.time()
+
+        try:
+            folders, files = scanRepository(load.root)
+            error = None
+        except (IOError, OSError) as exception:
+            folders, files = None, None
+            error = exception
+
+        self.results.put(
+            (load, startTime, folders, files, error, time.time() - startTime)
+        )
+
+    def collect(self):
+        """
+        Return the loads that finished since the last call. Meant to be called from the main thread.
+        """
+
+        finished = []
+
+        while True:
+            try:
+                load, startTime, folders, files, error, duration = (
+                    self.results.get_nowait()
+                )
+            except queue.Empty:
+                break
+
+            load.finished = time.time()
+            load.error = error
+            load.loads += 1
+            load.loadTime += duration
+
+            if folders is not None:
+                # unchanged files are parsed into the same objects by the shared caches
+                if files != load.files:
+                    self.revision += 1
+
+                load.folders = folders
+                load.files = files
+                load.scanned = startTime
+                finished.append(load)
+
+        return finished
+
+    def isAvailable(self, root):
+        """
+        Check whether a repository can be read from. Repositories that aren't loaded by the loader
+        always are.
+        """
+
+        load = self.loads.get(root)
+        if load is None:
+            return True
+
+        if load.folders is None:
+            return False
+
+        return not (load.isLoading() and time.time() - load.started > self.timeout)
+
+    def invalidate(self, path):
+        """
+        Let the loader know a folder changed. The repository it belongs to is loaded again right away,
+        its files are read from disk until that load is done.
+        """
+
+        path = path.replace("\\", "/").rstrip("/") + "/"
+
+        for root, load in list(self.loads.items()):
+            if path.startswith(load.path) or load.path.startswith(path):
+                load.invalidated = time.time()
+                self.revision += 1
+                self.start(root)
+
+    def findLoad(self, path):
+        """
+        Return the load of the repository a path belongs to, or None if that repository wasn't loaded
+        or changed since.
+        """
+
+        path = path.replace("\\", "/")
+
+        for load in self.loads.values():
+            if load.folders is not None and (path + "/").startswith(load.path):
+                return None if load.isStale() else load
+
+        return None
+
+    def isFolder(self, path):
+        """
+        Check whether a path is a folder. Repositories that weren't loaded are read from disk.
+        """
+
+        load = self.findLoad(path)
+        if load is None:
+            return W_hotboxCache.isFolder(path)
+
+        return path.replace("\\", "/").rstrip("/") in load.folders
+
+    def getHeader(self, path):
+        """
+        Return the ButtonHeader of a button file, or None if there is no such file. Repositories that
+        weren't loaded are read from disk.
+        """
+
+        load = self.findLoad(path)
+        path = path.replace("\\", "/")
+
+        # only files that were listed are asked for, a missing one was added since the repository was
+        # loaded
+        if load is None or path not in load.files:
+            return W_hotboxCache.getHeader(path)
+
+        return load.files[path]
+
+    def getName(self, folder):
+        """
+        Return the name of a submenu. Repositories that weren't loaded are read from disk.
+        """
+
+        load = self.findLoad(folder)
+        if load is None:
+            return W_hotboxCache.getName(folder)
+
+        return load.files.get(folder.replace("\\", "/").rstrip("/") + "/_name.json")
+
+    def getRule(self, ruleFile):
+        """
+        Return the rule defined by a rule file, or None if there is no such file. Repositories that
+        weren't loaded are read from disk.
+        """
+
+        load = self.findLoad(ruleFile)
+        ruleFile = ruleFile.replace("\\", "/")
+
+        if load is None or ruleFile not in load.files:
+            return W_hotboxRules.readRule(ruleFile)
+
+        return load.files[ruleFile]
+
+    def isLoading(self):
+        """
+        Check whether any repository is being loaded that didn't exceed the timeout yet.
+        """
+
+        return any(
+            load.isLoading() and time.time() - load.started <= self.timeout
+            for load in self.loads.values()
+        )
+
+    def statistics(self):
+        """
+        Return a dictionary describing the state of every repository.
+        """
+
+        return dict(
+            (
+                root,
+                {
+                    "available": self.isAvailable(root),
+                    "loading": load.isLoading(),
+                    "loads": load.loads,
+                    "loadTime": load.loadTime,
+                    "error": str(load.error) if load.error else None,
+                },
+            )
+            for root, load in self.loads.items()
+        )
+
+
+def scanRepository(root):
+    """
+    List every folder of a repository and parse the files the hotbox is going to read. Returns
+    {folder path: (mtime, sorted entries)} and {file path: parsed content}, using the paths the catalog
+    uses.
+    """
+
+    root = root.replace("\\", "/").rstrip("/")
+
+    folders = {}
+    files = {}
+
+    def raiseError(error):
+        raise error
+
+    for folder, dirNames, fileNames in os.walk(root, onerror=raiseError):
+        folder = folder.replace("\\", "/").rstrip("/")
+
+        folders[folder] = (os.stat(folder).st_mtime, sorted(dirNames + fileNames))
+
+        # folders like '_bytecode' aren't read by the hotbox
+        dirNames[:] = [name for name in dirNames if name[0] not in "._"]
+
+        for fileName in fileNames:
+            path = folder + "/" + fileName
+
+            if fileName in ["_rule.py", "_rule.json"]:
+                files[path] = W_hotboxRules.readRule(path)
+
+            elif fileName == "_name.json":
+                files[path] = W_hotboxCache.getName(folder)
+
+            elif len(fileName) == 6 and fileName.endswith(".py"):
+                files[path] = W_hotboxCache.getHeader(path)
+
+    return folders, files
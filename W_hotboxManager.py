@@ -22,14 +22,21 @@ import colorsys
 import tempfile
 import tarfile
 import base64
+import json
 
 from datetime import datetime as dt
 from webbrowser import open as openURL
 
 import W_hotbox
+import W_hotboxCache
+import W_hotboxCatalog
+import W_hotboxRules
 
 preferencesNode = nuke.toNode("preferences")
 
+# buttons taking longer than this (in seconds) to run are highlighted in the tree
+slowButtonDuration = 0.5
+
 
 class HotboxManager(QtWidgets.QWidget):
     def __init__(self, path=""):
@@ -525,6 +532,8 @@ class HotboxManager(QtWidgets.QWidget):
             ruleFile.write(FileHeader("0", rule=True).getHeader())
             ruleFile.close()
 
+        invalidateFolders(self.path)
+
         self.buildClassesList(name)
         self.renameClass(True)
 
@@ -555,6 +564,8 @@ class HotboxManager(QtWidgets.QWidget):
             + dt.now().strftime("%Y%m%d%H%M%S"),
         )
 
+        invalidateFolders(self.path)
+
         self.buildClassesList(True)
 
     def renameClass(self, new=False):
@@ -618,12 +629,16 @@ class HotboxManager(QtWidgets.QWidget):
             else:
                 item = self.classesList.currentItem()
                 itemState = 1 - bool(item.checkState())
-                self.loadedScript = "/".join(
-                    [self.path, item.text() + "_" * itemState, "_rule.py"]
-                )
+                rulePath = "/".join([self.path, item.text() + "_" * itemState])
+
+                self.loadedScript = rulePath + "/_rule.py"
+                if not os.path.exists(self.loadedScript) and os.path.exists(
+                    rulePath + "/_rule.json"
+                ):
+                    self.loadedScript = rulePath + "/_rule.json"
 
             # if item (not submenu)
-            if self.loadedScript.endswith(".py"):
+            if self.loadedScript.endswith((".py", ".json")):
                 self.enableScriptEditor()
 
                 if not rule:
@@ -645,25 +660,26 @@ class HotboxManager(QtWidgets.QWidget):
 
                 # rule
                 else:
-                    ignoreClasses = int(
-                        getAttributeFromFile(self.loadedScript, "ignore classes")
-                    )
+                    # the rule file may be missing, or just renamed
+                    rule = W_hotboxRules.ruleEngine.getRule(self.loadedScript)
+                    ignoreClasses = rule.ignoreClasses if rule is not None else False
 
                     self.ignoreSave = True
                     self.rulesFlagCheckbox.setChecked(ignoreClasses)
                     self.ignoreSave = False
 
-                # set script
-                text = getScriptFromFile(self.loadedScript)
+                # set script, json rules are shown as they are
+                if self.loadedScript.endswith(".json"):
+                    text = open(self.loadedScript).read()
+                else:
+                    text = getScriptFromFile(self.loadedScript)
                 self.scriptEditorScript.setPlainText(text)
                 self.scriptEditorScript.updateSavedText()
 
             # if submenu
             else:
                 # set name
-                self.scriptEditorName.setText(
-                    open(self.loadedScript + "/_name.json").read()
-                )
+                self.scriptEditorName.setText(W_hotboxCache.getName(self.loadedScript))
                 self.enableScriptEditor(False, True)
 
         else:
@@ -740,7 +756,7 @@ class HotboxManager(QtWidgets.QWidget):
                 path = self.loadedScript
 
             # file
-            if path.endswith(".py"):
+            if path.endswith((".py", ".json")):
                 text = self.scriptEditorScript.toPlainText()
 
                 if not rule:
@@ -753,18 +769,21 @@ class HotboxManager(QtWidgets.QWidget):
                     )
 
                 else:
-                    newFileContent = (
-                        FileHeader(
-                            int(self.rulesFlagCheckbox.isChecked()), rule=True
-                        ).getHeader()
-                        + text
-                    )
+                    path, newFileContent = self.composeRule(path, text)
+
+                    # a rule can switch between python and json
+                    if path != self.loadedScript:
+                        if os.path.exists(self.loadedScript):
+                            os.remove(self.loadedScript)
+                        self.loadedScript = path
 
                 # save to disk
                 currentFile = open(path, "w")
                 currentFile.write(newFileContent)
                 currentFile.close()
 
+                invalidateFolders(os.path.dirname(path))
+
                 # change save status
                 self.scriptEditorScript.updateSavedText()
 
@@ -775,6 +794,8 @@ class HotboxManager(QtWidgets.QWidget):
                 currentFile.write(name)
                 currentFile.close()
 
+                invalidateFolders(self.loadedScript)
+
             if not rule:
                 self.selectedItem.setText(name)
 
@@ -783,6 +804,32 @@ class HotboxManager(QtWidgets.QWidget):
                 if path.startswith(self.templateLocation):
                     self.scriptEditorTemplateMenu.initMenu()
 
+    def composeRule(self, path, text):
+        """
+        Return the path and content of the file a rule will be saved to. Rules consisting of a json
+        object are stored as '_rule.json', any other rule as a python script in '_rule.py'.
+        """
+
+        ignoreClasses = int(self.rulesFlagCheckbox.isChecked())
+        rulePath = os.path.dirname(path)
+
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+
+        if isinstance(data, dict):
+            data["ignoreClasses"] = ignoreClasses
+            content = json.dumps(data, indent=4, sort_keys=True) + "\n"
+            return rulePath + "/_rule.json", content
+
+        # keep invalid json as is, rather than turning it into a python rule
+        if path.endswith(".json"):
+            return path, text
+
+        content = FileHeader(ignoreClasses, rule=True).getHeader() + text
+        return rulePath + "/_rule.py", content
+
     # --------------------------------------------------------------------------------------------------
     # Rules mode
     # --------------------------------------------------------------------------------------------------
@@ -898,7 +945,15 @@ class HotboxManager(QtWidgets.QWidget):
 
         # write to zip
         with tarfile.open(archiveLocation, "w:gz") as tar:
-            tar.add(self.rootLocation, arcname=os.path.basename(self.rootLocation))
+            tar.add(
+                self.rootLocation,
+                arcname=os.path.basename(self.rootLocation),
+                filter=lambda member: (
+                    None
+                    if os.path.basename(member.name) == W_hotbox.bytecodeFolderName
+                    else member
+                ),
+            )
 
         # ----------------------------------------------------------------------------------------------
         # file
@@ -1205,6 +1260,8 @@ class HotboxManager(QtWidgets.QWidget):
                 importedArchiveLocation + "/" + i[0], baseFolder + "/" + fileName
             )
 
+        invalidateFolders(self.rootLocation)
+
         # reinitiate
         self.buildClassesList()
 
@@ -1214,6 +1271,10 @@ class HotboxManager(QtWidgets.QWidget):
 
     def closeManager(self):
         self.close()
+
+        # the manager is parented to the main window, which would keep it around otherwise
+        self.deleteLater()
+
         global hotboxManagerInstance
         hotboxManagerInstance = None
 
@@ -1286,6 +1347,7 @@ class QListWidgetCustom(QtWidgets.QListWidget):
 
             if not os.path.exists(newRulePath):
                 os.rename(origRulePath, newRulePath)
+                invalidateFolders(self.hotboxManager.path)
                 break
 
     def focusInEvent(self, event):
@@ -2442,10 +2504,13 @@ def getHotBoxLocation(path=None):
 # - Template Button
 class ScriptEditorTemplateMenu(QtWidgets.QMenu):
     def __init__(self, parentObject):
-        super(ScriptEditorTemplateMenu, self).__init__()
+        super(ScriptEditorTemplateMenu, self).__init__(parentObject)
 
         self.hotbox = parentObject
 
+        # actions of templates store the path of their template, the actions of submenus included
+        self.triggered.connect(self.actionTriggered)
+
         # set default template folder
         folder = getHotBoxLocation()
 
@@ -2521,17 +2586,27 @@ class ScriptEditorTemplateMenu(QtWidgets.QMenu):
 
         # bind function
 
-        # if a script is passed instead of a function, turn it into a function
-        if not callable(function):
-            script = function
-            function = lambda: self.insertTemplate(script)
-
-        action.triggered.connect(function)
+        # if a script is passed instead of a function, it gets inserted by actionTriggered. Connecting a
+        # closure instead would keep the menu, and the manager it belongs to, alive.
+        if callable(function):
+            action.triggered.connect(function)
+        else:
+            action.setData(function)
 
         # addToMenu
         parent.addAction(action)
         self.menuItems.append(action)
 
+    def actionTriggered(self, action):
+        """
+        Insert the template of the action that was triggered, if it belongs to a template.
+        """
+
+        path = action.data()
+
+        if path:
+            self.insertTemplate(path)
+
     def insertTemplate(self, path):
         """
         Insert template script into script editor
@@ -2617,6 +2692,9 @@ class QTreeViewCustom(QtWidgets.QTreeView):
         self.scope = ""
         self.previousScope = ""
 
+        # statistics of the buttons in scope, by path
+        self.statistics = {}
+
         # Unfortunatley Nuke 10 crashes on startup when using the following line:
         # self.selectionModel().selectionChanged.connect(self.setSelectedItems)
         # Therefore I had to do this weird construction where the setModel Method is subclassed.
@@ -2690,6 +2768,10 @@ class QTreeViewCustom(QtWidgets.QTreeView):
         self.buttonsList = {}
         self.clearTree()
 
+        self.statistics = {}
+        if preferencesNode.knob("hotboxTelemetry").value():
+            self.statistics = W_hotbox.telemetryStore.statistics(self.scope)
+
         # Fill the buttonstree if there is an item selected in the classescolumn, or the mode is set to all.
         if (
             not self.parentClass.contextual
@@ -2741,6 +2823,9 @@ class QTreeViewCustom(QtWidgets.QTreeView):
                 # store in the list for easy access
                 self.buttonsList[filePath] = child
 
+                if filePath in self.statistics:
+                    child.showStatistics(self.statistics[filePath])
+
                 if os.path.isdir(filePath):
                     self.addChild(child, filePath)
 
@@ -2910,6 +2995,7 @@ class QTreeViewCustom(QtWidgets.QTreeView):
         """
         # rename actual file
         os.rename(origPath, newPath)
+        invalidateFolders(os.path.dirname(origPath), os.path.dirname(newPath))
 
         # update path for button objects
 
@@ -3051,6 +3137,8 @@ class QTreeViewCustom(QtWidgets.QTreeView):
             currentFile.write(itemName)
             currentFile.close()
 
+        invalidateFolders(os.path.dirname(itemPath))
+
         self.populateTree()
 
         self.restoreSelection(itemPath)
@@ -3088,6 +3176,7 @@ class QTreeViewCustom(QtWidgets.QTreeView):
             counter += 1
 
         shutil.move(currentItem.path, oldFolder + newFileName)
+        invalidateFolders(os.path.dirname(currentItem.path))
 
         # make sure all the files inside the folder are named correctly
         changedFolder = os.path.dirname(currentItem.path)
@@ -3145,6 +3234,8 @@ class QTreeViewCustom(QtWidgets.QTreeView):
                 else:
                     shutil.copytree(path, newPath)
 
+                invalidateFolders(self.scope)
+
             self.populateTree()
 
             self.restoreSelection(newPath)
@@ -3204,6 +3295,18 @@ class QStandardItemChild(QtGui.QStandardItem):
         if parentObject != None:
             self.currentGuiPath = parentObject.path
 
+    def showStatistics(self, statistics):
+        """
+        Show how the button performed when invoked. Slow buttons and buttons raising errors stand out.
+        """
+
+        self.setToolTip(statistics.describe())
+
+        if statistics.errors:
+            self.setForeground(QtGui.QColor(230, 90, 70))
+        elif statistics.percentile95 > slowButtonDuration:
+            self.setForeground(QtGui.QColor(255, 170, 0))
+
 
 class QLabelButton(QtWidgets.QLabel):
     """
@@ -3401,6 +3504,7 @@ class RenameDialog(QtWidgets.QDialog):
                 counter += 1
 
             shutil.move(currentPath, newPath)
+            invalidateFolders(self.hotboxManager.path)
 
             self.hotboxManager.buildClassesList(os.path.basename(newPath))
 
@@ -3653,6 +3757,8 @@ class RepairHotbox:
 
             self.repairFolder(i)
 
+        invalidateFolders(self.root)
+
         if message:
             nuke.message("Succesfully repaired")
 
@@ -3738,48 +3844,35 @@ def clearHotboxManager(sections=["Single", "Multiple", "All", "Rules"]):
         except:
             pass
 
+    invalidateFolders(hotboxLocation)
+
 
 # - Commenly used functions
-def getAttributeFromFile(path, attribute="name"):
+def invalidateFolders(*paths):
     """
-    Scan file for the appropriate attribute.
-    By default attribute is name. If no attribute found, return None
+    Let the hotbox know the content of folders changed, so they will be indexed again.
     """
 
-    if os.path.isfile(path):
-        tag = "# %s: " % attribute.upper()
-        for line in open(path).readlines():
-            if not line.startswith("#"):
-                break
+    for path in paths:
+        W_hotboxCatalog.invalidateCatalogs(path)
+        W_hotbox.repositoryLoader.invalidate(path)
 
-            if line.startswith(tag):
-                result = line.split(tag)[-1].replace("\n", "")
-                return result
 
-    else:
-        if attribute == "name":
-            nameFile = path + "/_name.json"
-            if os.path.isfile(nameFile):
-                result = open(nameFile).read()
-                return result
+def getAttributeFromFile(path, attribute="name"):
+    """
+    Scan file for the appropriate attribute.
+    By default attribute is name. If no attribute found, return None
+    """
 
-    return None
+    return W_hotboxCache.getAttribute(path, attribute)
 
 
 def getScriptFromFile(path):
     """
     Extract the appropriate fucntion from the file. If no name found, return None
     """
-    if os.path.isfile(path):
-        openFile = open(path).readlines()
-
-        for index, line in enumerate(openFile):
-            if not line.startswith("#"):
-                script = "".join(openFile[index + 1 :]).replace("\t", " " * 4)
 
-                return script
-
-    return None
+    return W_hotboxCache.getScript(path)
 
 
 def getFirstAvailableFilePath(folder):
@@ -3812,6 +3905,10 @@ def showHotboxManager(path=""):
     # check if the manager is opened already, if so close that instance.
     if hotboxManagerInstance != None:
         hotboxManagerInstance.close()
+        hotboxManagerInstance.deleteLater()
+        hotboxManagerInstance = None
+
+    W_hotbox.sampleMemory("manager")
 
     path = getHotBoxLocation(path)
 
@@ -0,0 +1,188 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox memory
+#
+# Diagnostics for memory held on to by the hotbox and the manager. A sample records the memory allocated
+# by Python and the amount of widgets per class. Samples are taken at the same moment of a cycle, like
+# the launch of the hotbox or the opening of the manager, so they should stay flat: whatever was added
+# since the previous sample with the same label got retained by the previous cycle.
+#
+# Python allocations are tracked with tracemalloc, which is only available on Python 3. On Python 2 only
+# the widgets are counted.
+# ----------------------------------------------------------------------------------------------------------
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+class MemorySample(object):
+    """
+    Memory in use at a single moment.
+    """
+
+    __slots__ = ["label", "index", "traced", "widgets"]
+
+    def __init__(self, label, index, traced, widgets):
+        self.label = label
+        self.index = index
+        self.traced = traced
+        self.widgets = widgets
+
+    def widgetCount(self):
+        return sum(self.widgets.values())
+
+    def compare(self, other):
+        """
+        Return the amount of bytes and widgets (by class) added since other.
+        """
+
+        widgets = {}
+        for name in set(self.widgets) | set(other.widgets):
+            difference = self.widgets.get(name, 0) - other.widgets.get(name, 0)
+            if difference:
+                widgets[name] = difference
+
+        return self.traced - other.traced, widgets
+
+
+def formatBytes(amount, signed=False):
+    return ("%+.1f KB" if signed else "%.1f KB") % (amount / 1024.0)
+
+
+class MemoryMonitor(object):
+    """
+    Takes samples, and keeps the first and the most recent ones of every label to compare against.
+    """
+
+    def __init__(self, frames=10):
+        self.frames = frames
+
+        self.started = False
+        self.ownsTracing = False
+
+        # allocations at the moment the monitor was started
+        self.snapshot = None
+
+        self.first = {}
+        self.last = {}
+
+    def isTracing(self):
+        return tracemalloc is not None and tracemalloc.is_tracing()
+
+    def start(self):
+        if self.started:
+            return
+
+        self.started = True
+
+        if tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.ownsTracing = True
+
+        self.snapshot = self.takeSnapshot()
+
+    def stop(self):
+        if not self.started:
+            return
+
+        if self.ownsTracing:
+            tracemalloc.stop()
+
+        self.started = False
+        self.ownsTracing = False
+        self.snapshot = None
+
+        self.first = {}
+        self.last = {}
+
+    def takeSnapshot(self):
+        if not self.isTracing():
+            return None
+
+        # leave out the allocations of tracemalloc itself
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+
+    def sample(self, label, widgets=()):
+        """
+        Record the memory in use now. widgets are the widgets alive at the moment, counted by class.
+        Returns a description of what changed since the previous and first sample with the same label.
+        """
+
+        traced = tracemalloc.get_traced_memory()[0] if self.isTracing() else 0
+
+        widgetCounts = {}
+        for widget in widgets:
+            name = type(widget).__name__
+            widgetCounts[name] = widgetCounts.get(name, 0) + 1
+
+        previous = self.last.get(label)
+        index = previous.index + 1 if previous else 1
+
+        sample = MemorySample(label, index, traced, widgetCounts)
+
+        self.first.setdefault(label, sample)
+        self.last[label] = sample
+
+        return self.describe(sample, previous, self.first[label])
+
+    def retained(self, label):
+        """
+        Return the amount of bytes and widgets (by class) added between the first and last sample
+        with the same label.
+        """
+
+        if label not in self.first:
+            return 0, {}
+
+        return self.last[label].compare(self.first[label])
+
+    def describe(self, sample, previous, first):
+        lines = ["\nW_HOTBOX MEMORY: %s %i" % (sample.label, sample.index)]
+
+        if self.isTracing():
+            traced = "%s traced" % formatBytes(sample.traced)
+            if previous:
+                traced += ", %s since %s %i" % (
+                    formatBytes(sample.traced - previous.traced, True),
+                    previous.label,
+                    previous.index,
+                )
+            if first not in [sample, previous]:
+                traced += ", %s since %s %i" % (
+                    formatBytes(sample.traced - first.traced, True),
+                    first.label,
+                    first.index,
+                )
+            lines.append(traced)
+
+        widgets = "%i widgets" % sample.widgetCount()
+        if previous:
+            differences = sample.compare(previous)[1]
+            widgets += ", %+i since %s %i" % (
+                sum(differences.values()),
+                previous.label,
+                previous.index,
+            )
+            if differences:
+                widgets += " (%s)" % ", ".join(
+                    "%s %+i" % (name, differences[name]) for name in sorted(differences)
+                )
+        lines.append(widgets)
+
+        return "\n".join(lines)
+
+    def topAllocations(self, amount=20):
+        """
+        Return the lines of code that allocated the most memory still in use since the monitor was
+        started.
+        """
+
+        if self.snapshot is None or not self.isTracing():
+            return []
+
+        statistics = self.takeSnapshot().compare_to(self.snapshot, "lineno")
+
+        return [str(statistic) for statistic in statistics[:amount]]
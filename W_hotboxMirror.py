@@ -0,0 +1,290 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox mirror
+#
+# Local copy of an extra repository living on a network location. The hotbox reads the buttons from the
+# local copy, while a background thread keeps it in sync with the original. Only files whose modification
+# time or size changed are copied again. When the original can't be reached, the local copy is left
+# untouched and keeps working as it was.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import json
+import hashlib
+import time
+import shutil
+import tempfile
+import threading
+
+# temporary files are hidden, so they are never mistaken for buttons. They're tagged with the id of the
+# process writing them, as other sessions might be syncing the same mirror.
+tempPrefix = ".mirror_"
+processPrefix = "%s%i_" % (tempPrefix, os.getpid())
+
+# temporary files of other sessions are only removed once they're this old, in seconds
+tempFileAge = 3600.0
+
+# replaces an existing file in one go, Python 2 has no os.replace
+replaceFile = getattr(os, "replace", None)
+
+
+def raiseError(error):
+    raise error
+
+
+class RepositoryMirror(object):
+    """
+    A local copy of a repository, synced at most once every syncInterval seconds.
+    """
+
+    syncInterval = 300.0
+
+    def __init__(self, source, local):
+        source = source.replace("\\", "/")
+        local = local.replace("\\", "/")
+
+        self.source = source.rstrip("/") + "/"
+        self.local = local.rstrip("/") + "/"
+
+        self.manifestPath = self.local + "_mirror.json"
+
+        self.thread = None
+        self.lastSync = 0.0
+        self.lastError = None
+
+        # called with the mirror (on the syncing thread) whenever files were updated
+        self.onSynced = None
+
+        # statistics
+        self.syncs = 0
+        self.copied = 0
+        self.removed = 0
+
+    def ready(self):
+        """
+        Check whether the local copy was completed at least once.
+        """
+        return os.path.exists(self.manifestPath)
+
+    def isSyncing(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, force=False):
+        """
+        Sync the local copy in the background, if it's due.
+        """
+
+        if self.isSyncing():
+            return
+
+        if not force and time.time() - self.lastSync < self.syncInterval:
+            return
+
+        self.lastSync = time.time()
+
+        self.thread = threading.Thread(target=self.sync)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def sync(self):
+        """
+        Bring the local copy up to date.
+        """
+
+        try:
+            changed = self.update()
+            self.lastError = None
+        except (IOError, OSError) as error:
+            self.lastError = error
+            changed = False
+
+        self.syncs += 1
+        self.lastSync = time.time()
+
+        if changed and self.onSynced is not None:
+            self.onSynced(self)
+
+    # --------------------------------------------------------------------------------------------------
+    # syncing
+    # --------------------------------------------------------------------------------------------------
+
+    def readManifest(self):
+        """
+        Return the modification time and size of every file, as they were when last copied.
+        """
+
+        try:
+            with open(self.manifestPath) as manifestFile:
+                return json.load(manifestFile)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def writeManifest(self, manifest):
+        fileDescriptor, tmpPath = tempfile.mkstemp(prefix=processPrefix, dir=self.local)
+        with os.fdopen(fileDescriptor, "w") as manifestFile:
+            json.dump(manifest, manifestFile)
+
+        self.replace(tmpPath, self.manifestPath)
+
+    def replace(self, tmpPath, path):
+        """
+        Replace path with tmpPath in one go, so the hotbox never finds the file missing.
+        """
+
+        if replaceFile is not None:
+            replaceFile(tmpPath, path)
+            return
+
+        # Python 2 on Windows can't rename over an existing file
+        if os.name == "nt" and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmpPath, path)
+
+    def removeTempFiles(self):
+        """
+        Remove the temporary files left behind by a sync that got interrupted. Temporary files of other
+        sessions might still be written to, they're only removed when they're old.
+        """
+
+        for root, dirNames, fileNames in os.walk(self.local):
+            for fileName in fileNames:
+                if not fileName.startswith(tempPrefix):
+                    continue
+
+                path = os.path.join(root, fileName)
+
+                try:
+                    if (
+                        fileName.startswith(processPrefix)
+                        or time.time() - os.path.getmtime(path) > tempFileAge
+                    ):
+                        os.remove(path)
+                except OSError:
+                    pass
+
+    def scan(self):
+        """
+        Return the folders and files (with their modification time and size) of the original. Raises
+        an error rather than returning an incomplete result when anything can't be read.
+        """
+
+        folders = set()
+        files = {}
+
+        for root, dirNames, fileNames in os.walk(self.source, onerror=raiseError):
+            dirNames[:] = [name for name in dirNames if name[0] not in "._"]
+
+            relativeRoot = root.replace("\\", "/")[len(self.source) :].strip("/")
+            folders.add(relativeRoot)
+
+            for fileName in fileNames:
+                if fileName[0] == ".":
+                    continue
+
+                relativePath = "/".join([relativeRoot, fileName]).strip("/")
+                fileStat = os.stat(os.path.join(root, fileName))
+                files[relativePath] = [fileStat.st_mtime, fileStat.st_size]
+
+        return folders, files
+
+    def update(self):
+        """
+        Copy new and changed files, and remove whatever was removed from the original. Returns whether
+        anything changed.
+        """
+
+        folders, files = self.scan()
+
+        if not os.path.isdir(self.local):
+            os.makedirs(self.local)
+
+        self.removeTempFiles()
+
+        manifest = self.readManifest()
+        changed = False
+
+        for folder in sorted(folders):
+            localFolder = self.local + folder
+            if not os.path.isdir(localFolder):
+                os.makedirs(localFolder)
+                changed = True
+
+        for relativePath, signature in files.items():
+            localPath = self.local + relativePath
+            if manifest.get(relativePath) == signature and os.path.exists(localPath):
+                continue
+
+            # copy next to the destination first, so the hotbox never reads half a file
+            fileDescriptor, tmpPath = tempfile.mkstemp(
+                prefix=processPrefix, dir=os.path.dirname(localPath)
+            )
+            os.close(fileDescriptor)
+            shutil.copy2(self.source + relativePath, tmpPath)
+            self.replace(tmpPath, localPath)
+
+            manifest[relativePath] = signature
+            self.copied += 1
+            changed = True
+
+        for relativePath in list(manifest.keys()):
+            if relativePath not in files:
+                if os.path.exists(self.local + relativePath):
+                    os.remove(self.local + relativePath)
+                del manifest[relativePath]
+                self.removed += 1
+                changed = True
+
+        # remove folders that no longer exist in the original, leaving folders like '_bytecode' alone
+        for root, dirNames, fileNames in os.walk(self.local, topdown=False):
+            relativeRoot = root.replace("\\", "/")[len(self.local) :].strip("/")
+            if not relativeRoot or relativeRoot in folders:
+                continue
+
+            if not any(name[0] in "._" for name in relativeRoot.split("/")):
+                shutil.rmtree(root, ignore_errors=True)
+                changed = True
+
+        if changed or not self.ready():
+            self.writeManifest(manifest)
+
+        return changed
+
+    def statistics(self):
+        """
+        Return a dictionary describing the state of the mirror.
+        """
+
+        return {
+            "source": self.source,
+            "local": self.local,
+            "ready": self.ready(),
+            "syncing": self.isSyncing(),
+            "syncs": self.syncs,
+            "copied": self.copied,
+            "removed": self.removed,
+            "lastError": str(self.lastError) if self.lastError else None,
+        }
+
+
+# - mirror registry
+
+mirrors = {}
+
+
+def getMirror(name, source, mirrorFolder):
+    """
+    Return the mirror of a repository, stored in a subfolder of mirrorFolder named after the repository.
+    The name is followed by a hash of the original location, as different names can end up the same
+    once made safe to use as folder name.
+    """
+
+    source = source.replace("\\", "/").rstrip("/") + "/"
+
+    if source not in mirrors:
+        folderName = "".join(
+            character if character.isalnum() or character in "-_." else "_"
+            for character in name
+        )
+        folderName += "_" + hashlib.md5(source.encode("utf-8")).hexdigest()[:8]
+        mirrors[source] = RepositoryMirror(source, mirrorFolder + "/" + folderName)
+
+    return mirrors[source]
@@ -0,0 +1,344 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox pack
+#
+# A packed repository is a single file holding a complete hotbox repository: the content of every folder
+# and file, and an index describing where to find them. Publishing a repository as a pack means launching
+# the hotbox costs a single file on the network share, rather than one round trip per button.
+#
+# Paths inside a pack look like regular paths, with the pack acting as the root folder:
+# '/share/studio.hotboxpack/Single/Read/001.py'. The pack is memory mapped and files are only read
+# when they are asked for.
+#
+# Pack a repository from the W_hotbox menu, or from the command line:
+#
+#   python W_hotboxPack.py /path/to/repository /path/to/studio.hotboxpack
+#
+# Layout of a pack: header (magic, index offset, index length), the content of every file, and the
+# index as json: {"folders": {relative path: [entries]}, "files": {relative path: [offset, length]}}
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import tempfile
+import threading
+
+packExtension = ".hotboxpack"
+
+magic = b"WHBPACK1"
+headerFormat = "<8sQQ"
+headerSize = struct.calcsize(headerFormat)
+
+# replaces an existing file in one go, Python 2 has no os.replace
+replaceFile = getattr(os, "replace", None)
+
+
+class PackedRepository(object):
+    """
+    A pack file opened for reading. The file is checked for changes at most once every checkInterval
+    seconds, and opened again when it was replaced.
+    """
+
+    checkInterval = 1.0
+
+    def __init__(self, path):
+        self.path = path
+
+        self.signature = None
+        self.checked = 0.0
+
+        self.folders = {}
+        self.files = {}
+
+        self.openFile = None
+        self.data = None
+
+        self.lock = threading.Lock()
+
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """
+        Open the pack again if it was modified since it was last opened.
+        """
+
+        if not force and time.time() - self.checked < self.checkInterval:
+            return
+
+        self.checked = time.time()
+
+        try:
+            fileStat = os.stat(self.path)
+            signature = (
+                getattr(fileStat, "st_mtime_ns", fileStat.st_mtime),
+                fileStat.st_size,
+            )
+        except OSError:
+            signature = None
+
+        if signature == self.signature and not force:
+            return
+
+        with self.lock:
+            self.close()
+            self.signature = signature
+
+            if signature is None:
+                return
+
+            try:
+                self.load()
+            except (IOError, OSError, ValueError, struct.error):
+                self.close()
+                self.signature = None
+
+    def load(self):
+        if os.name == "nt":
+            # on Windows a file can't be replaced while it's open, which would keep every session using
+            # the pack from publishing a new version of it. The pack is read into memory instead.
+            with open(self.path, "rb") as packFile:
+                self.data = packFile.read()
+        else:
+            self.openFile = open(self.path, "rb")
+            self.data = mmap.mmap(self.openFile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        fileMagic, indexOffset, indexLength = struct.unpack(
+            headerFormat, self.data[:headerSize]
+        )
+        if fileMagic != magic:
+            raise ValueError("Not a hotbox pack: '%s'" % self.path)
+
+        index = json.loads(
+            self.data[indexOffset : indexOffset + indexLength].decode("utf-8")
+        )
+
+        self.folders = index["folders"]
+        self.files = dict(
+            (path, tuple(entry)) for path, entry in index["files"].items()
+        )
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        if self.openFile is not None:
+            self.openFile.close()
+
+        self.data = None
+        self.openFile = None
+        self.folders = {}
+        self.files = {}
+
+    # --------------------------------------------------------------------------------------------------
+    # access
+    # --------------------------------------------------------------------------------------------------
+
+    def listFolder(self, relativePath):
+        """
+        Return the entries of a folder, or None if there is no such folder.
+        """
+
+        self.refresh()
+        return self.folders.get(relativePath)
+
+    def isFolder(self, relativePath):
+        self.refresh()
+        return relativePath in self.folders
+
+    def fileSignature(self, relativePath):
+        """
+        Return (mtime, size, isFile) of an entry, mimicking a stat call. The modification time of the
+        pack is used for every entry.
+        """
+
+        self.refresh()
+
+        if self.signature is None:
+            return None
+
+        if relativePath in self.files:
+            return (self.signature[0], self.files[relativePath][1], True)
+
+        if relativePath in self.folders:
+            return (self.signature[0], 0, False)
+
+        return None
+
+    def read(self, relativePath):
+        """
+        Return the content of a file.
+        """
+
+        self.refresh()
+
+        with self.lock:
+            if relativePath not in self.files or self.data is None:
+                raise IOError("No such file: '%s/%s'" % (self.path, relativePath))
+
+            offset, length = self.files[relativePath]
+            return self.data[offset : offset + length].decode("utf-8")
+
+
+# - pack registry
+
+packs = {}
+
+
+def splitPath(path):
+    """
+    Return the path of the pack and the path relative to the pack, or None if the path isn't inside
+    a pack.
+    """
+
+    index = path.find(packExtension)
+    if index == -1:
+        return None
+
+    index += len(packExtension)
+    if len(path) > index and path[index] not in "/\\":
+        return None
+
+    return path[:index], path[index:].replace("\\", "/").strip("/")
+
+
+def getPack(path):
+    """
+    Return the PackedRepository and the relative path for a path inside a pack, or (None, None).
+    """
+
+    split = splitPath(path)
+    if split is None:
+        return None, None
+
+    packPath, relativePath = split
+
+    if packPath not in packs:
+        packs[packPath] = PackedRepository(packPath)
+
+    return packs[packPath], relativePath
+
+
+def isPacked(path):
+    return packExtension in path and splitPath(path) is not None
+
+
+def listFolder(path):
+    pack, relativePath = getPack(path)
+    return pack.listFolder(relativePath)
+
+
+def isFolder(path):
+    pack, relativePath = getPack(path)
+    return pack.isFolder(relativePath)
+
+
+def signature(path):
+    pack, relativePath = getPack(path)
+    return pack.fileSignature(relativePath)
+
+
+def read(path):
+    pack, relativePath = getPack(path)
+    return pack.read(relativePath)
+
+
+# - packing
+
+
+def packRepository(folder, packPath):
+    """
+    Pack the repository stored in folder into a single file. Folders starting with an underscore or a
+    dot (like '_old') are left out. Returns the amount of files packed.
+    """
+
+    folder = folder.replace("\\", "/").rstrip("/")
+
+    folders = {}
+    files = {}
+
+    packFolder = os.path.dirname(os.path.abspath(packPath))
+    fileDescriptor, tmpPath = tempfile.mkstemp(dir=packFolder)
+
+    # a pack that failed to be written doesn't leave anything behind
+    try:
+        with os.fdopen(fileDescriptor, "wb") as packFile:
+            packFile.write(struct.pack(headerFormat, magic, 0, 0))
+            offset = headerSize
+
+            for root, dirNames, fileNames in os.walk(folder):
+                dirNames[:] = sorted(name for name in dirNames if name[0] not in "._")
+
+                relativeRoot = root.replace("\\", "/")[len(folder) :].strip("/")
+
+                folders[relativeRoot] = sorted(
+                    dirNames + [name for name in fileNames if name[0] != "."]
+                )
+
+                for fileName in sorted(fileNames):
+                    if fileName[0] == ".":
+                        continue
+
+                    with open(os.path.join(root, fileName), "rb") as openFile:
+                        content = openFile.read()
+
+                    packFile.write(content)
+
+                    relativePath = "/".join([relativeRoot, fileName]).strip("/")
+                    files[relativePath] = [offset, len(content)]
+                    offset += len(content)
+
+            index = json.dumps({"folders": folders, "files": files}).encode("utf-8")
+            packFile.write(index)
+
+            packFile.seek(0)
+            packFile.write(struct.pack(headerFormat, magic, offset, len(index)))
+
+        # make the pack readable for everyone, like any other file of a repository
+        os.chmod(tmpPath, 0o644)
+
+        replacePack(tmpPath, packPath)
+
+    except:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+    return len(files)
+
+
+def replacePack(tmpPath, packPath, attempts=20):
+    """
+    Replace the previous pack in one go, so it's never missing or read half written. On Windows
+    replacing fails for as long as another process is reading the pack, which is retried for a moment.
+    """
+
+    for attempt in range(attempts):
+        try:
+            if replaceFile is not None:
+                replaceFile(tmpPath, packPath)
+
+            # Python 2 on Windows can't rename over an existing file
+            elif os.name == "nt" and os.path.exists(packPath):
+                os.remove(packPath)
+                os.rename(tmpPath, packPath)
+
+            else:
+                os.rename(tmpPath, packPath)
+
+            return
+
+        except OSError:
+            if os.name != "nt" or attempt == attempts - 1:
+                raise
+
+            time.sleep(0.1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python W_hotboxPack.py <repository folder> <pack file>")
+        sys.exit(1)
+
+    print("Packed %s files." % packRepository(sys.argv[1], sys.argv[2]))
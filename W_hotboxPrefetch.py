@@ -0,0 +1,157 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox prefetch
+#
+# There's usually a moment between the cursor entering a button and the button getting clicked. The
+# prefetcher uses that moment to do the work the click is going to need, on a single background thread:
+# compiling the script of a button, or reading the names and headers of the buttons of a submenu. Most
+# recently requested work is picked up first.
+#
+# Whenever the work is actually needed, it gets claimed, which keeps track of how often the prefetched
+# result was ready in time and how much time that saved.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import time
+import threading
+
+from collections import OrderedDict
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import W_hotboxCache
+import W_hotboxPack
+
+
+class Prefetcher(object):
+    """
+    Runs requested work on a background thread, at most once per key until it gets claimed.
+    """
+
+    def __init__(self, maxSize=256):
+        self.maxSize = maxSize
+
+        self.requests = queue.LifoQueue()
+        self.pending = set()
+        self.finished = OrderedDict()
+
+        self.lock = threading.Lock()
+        self.thread = None
+
+        # statistics
+        self.requested = 0
+        self.hits = 0
+        self.late = 0
+        self.misses = 0
+        self.savedTime = 0.0
+
+    def request(self, key, function, *args):
+        """
+        Run function with args in the background, unless work for key is already pending or finished.
+        """
+
+        with self.lock:
+            if key in self.pending or key in self.finished:
+                return
+
+            self.pending.add(key)
+            self.requested += 1
+
+        self.requests.put((key, function, args))
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def run(self):
+        """
+        Work through the requests. Runs on the prefetch thread.
+        """
+
+        while True:
+            key, function, args = self.requests.get()
+
+            startTime = time.time()
+            try:
+                function(*args)
+                duration = time.time() - startTime
+            except Exception:
+                # whatever went wrong will go wrong again when the work is actually needed
+                duration = None
+
+            with self.lock:
+                self.pending.discard(key)
+
+                if duration is None:
+                    continue
+
+                self.finished[key] = duration
+
+                while len(self.finished) > self.maxSize:
+                    self.finished.popitem(last=False)
+
+    def claim(self, key):
+        """
+        Mark the work for key as needed. Returns whether it was done in advance.
+        """
+
+        with self.lock:
+            duration = self.finished.pop(key, None)
+
+            if duration is not None:
+                self.hits += 1
+                self.savedTime += duration
+                return True
+
+            if key in self.pending:
+                self.late += 1
+            else:
+                self.misses += 1
+
+            return False
+
+    def statistics(self):
+        """
+        Return a dictionary describing how well the prefetcher performed so far.
+        """
+
+        claimed = self.hits + self.late + self.misses
+
+        return {
+            "requested": self.requested,
+            "hits": self.hits,
+            "late": self.late,
+            "misses": self.misses,
+            "hitRate": float(self.hits) / claimed if claimed else 0.0,
+            "savedTime": self.savedTime,
+        }
+
+
+def prefetchFolder(path):
+    """
+    Read the name of a submenu and the headers of the buttons it contains.
+    """
+
+    if W_hotboxPack.isPacked(path):
+        entries = W_hotboxPack.listFolder(path) or []
+    else:
+        entries = os.listdir(path)
+
+    W_hotboxCache.getName(path)
+
+    for entry in entries:
+        if entry[0] in "._":
+            continue
+
+        if entry.endswith(".py"):
+            W_hotboxCache.getHeader(path + "/" + entry)
+        else:
+            W_hotboxCache.getName(path + "/" + entry)
+
+
+# - shared prefetcher
+
+prefetcher = Prefetcher()
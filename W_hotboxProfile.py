@@ -0,0 +1,128 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox profile
+#
+# Runs a single button under cProfile, to find out why it's slow without having to copy its script to the
+# script editor. Every profile is written as a .pstats file (open it with pstats, snakeviz, etc.), next to
+# a .json file holding the tags of the profile: the repository and file of the button, its name and how
+# long it took. A summary of the most expensive functions gets reported right away.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import re
+import json
+import time
+import pstats
+import cProfile
+import traceback
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+timer = getattr(time, "perf_counter", time.time)
+
+
+def fileName(name):
+    """
+    Return a name that can safely be used as (part of) a file name.
+    """
+
+    # names may hold rich text
+    name = re.sub("<[^>]*>", "", name)
+    name = re.sub("[^A-Za-z0-9_-]+", "_", name).strip("_")
+
+    return name or "button"
+
+
+def summarize(profiler, amount):
+    """
+    Return the amount of functions that took the most time, including the time spent in the functions
+    they called.
+    """
+
+    stream = StringIO()
+    statistics = pstats.Stats(profiler, stream=stream)
+    statistics.strip_dirs().sort_stats("cumulative").print_stats(amount)
+
+    return stream.getvalue().strip("\n")
+
+
+def writeProfile(profiler, folder, tags, duration, report, amount):
+    """
+    Write a profile and its tags to folder, and report a summary. Returns the path of the profile.
+    """
+
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    # buttons without a name tag have a name of None
+    name = tags.get("name") or ""
+
+    now = time.time()
+    basePath = "%s/%s_%03i_%s" % (
+        folder,
+        time.strftime("%Y%m%d_%H%M%S", time.localtime(now)),
+        int(now * 1000) % 1000,
+        fileName(name),
+    )
+
+    # never overwrite an earlier profile
+    path = basePath
+    counter = 1
+    while os.path.exists(path + ".pstats"):
+        counter += 1
+        path = "%s_%i" % (basePath, counter)
+
+    profiler.dump_stats(path + ".pstats")
+
+    tags = dict(tags, duration=duration, time=now)
+    with open(path + ".json", "w") as tagsFile:
+        json.dump(tags, tagsFile, indent=4, sort_keys=True)
+
+    report(
+        "\nW_HOTBOX PROFILE: %s (%.1f ms)\n%s\n%s\n\n%s"
+        % (
+            re.sub("<[^>]*>", "", name),
+            duration * 1000,
+            "\n".join(
+                "%s: %s" % (tag, tags[tag])
+                for tag in ["repository", "path"]
+                if tag in tags
+            ),
+            "written to %s.pstats" % path,
+            summarize(profiler, amount),
+        )
+    )
+
+    return path + ".pstats"
+
+
+def profile(function, folder, tags, report, amount=25):
+    """
+    Run function under cProfile and write the profile to folder. tags is a dictionary describing what got
+    profiled, stored next to the profile. report gets called with a summary of the profile. Returns the
+    path of the profile, or None if it couldn't be written. Anything raised by function is raised again
+    once the profile is written.
+    """
+
+    profiler = cProfile.Profile()
+    startTime = timer()
+
+    try:
+        profiler.runcall(function)
+
+    finally:
+        duration = timer() - startTime
+
+        # the profile never gets in the way of the button itself, or hides what it raised
+        try:
+            path = writeProfile(profiler, folder, tags, duration, report, amount)
+        except Exception:
+            path = None
+            report(
+                "\nW_HOTBOX PROFILE: couldn't write the profile to %s\n%s"
+                % (folder, traceback.format_exc())
+            )
+
+    return path
@@ -0,0 +1,466 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox rules
+#
+# Rules are small scripts deciding whether the buttons stored next to them apply to the current
+# selection. Every rule file is read, parsed and compiled once, and only again after it was modified.
+# Evaluating the rules of a launch comes down to executing the compiled code of each of them.
+#
+# Next to '_rule.py', a rule can be stored as '_rule.json', describing the nodes it applies to rather than
+# computing it. Those are evaluated without running any Python code:
+#
+#   {
+#       "ignoreClasses": 0,
+#       "selection": {"min": 1, "max": 4},   amount of selected nodes
+#       "match": "any",                      'any' or 'all' of the selected nodes have to match
+#       "classes": ["Read", "DeepRead"],     class of the node
+#       "name": "^plate_",                   regular expression searched for in the name of the node
+#       "knobs": {"file_type": "exr"}        values of knobs of the node
+#   }
+#
+# Every key is optional. A rule applies when all of its predicates are met.
+#
+# A '_rule.py' can declare what its outcome depends on, in a line of its header like
+# '# DEPENDS: selection-classes, root-knob:format'. As long as those inputs don't change, the result of
+# the previous evaluation is reused, even across launches. Rules that don't declare anything are
+# evaluated on every launch. Available inputs:
+#
+#   none                nothing, the outcome only changes when the rule itself does
+#   selection           the full names of the selected nodes
+#   selection-count     the amount of selected nodes
+#   selection-classes   the classes of the selected nodes
+#   group               the group the selection lives in
+#   root-knob:<name>    the value of a knob of the root node
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import re
+import json
+import time
+import weakref
+import traceback
+
+from collections import deque, OrderedDict
+
+import W_hotboxCache
+
+# every rule runs with nuke imported and 'ret' set to False
+prefixCode = compile("import nuke\nret = False\n", "<rule>", "exec")
+
+dependencyNames = ["none", "selection", "selection-count", "selection-classes", "group"]
+
+timer = getattr(time, "perf_counter", time.time)
+
+
+class CompiledRule(object):
+    """
+    A rule file, parsed and compiled.
+    """
+
+    def __init__(self, path, content):
+        self.path = path
+        self.folder = os.path.dirname(path)
+        self.name = os.path.basename(self.folder)
+
+        info = W_hotboxCache.ButtonFileInfo(path, content)
+
+        # '# IGNORE CLASSES: 1' makes the buttons of the rule replace the buttons of the selection
+        try:
+            self.ignoreClasses = bool(int(info.getAttribute("ignore classes") or 0))
+        except ValueError:
+            self.ignoreClasses = False
+
+        self.code = None
+        self.error = None
+
+        # declared dependencies, None if the rule has to be evaluated every time
+        self.depends = None
+
+        # only read from the header, like every other tag
+        depends = info.getAttribute("depends")
+        if depends is not None:
+            self.depends = tuple(
+                dependency for dependency in re.split(r"[\s,]+", depends) if dependency
+            )
+
+            for dependency in self.depends:
+                if dependency not in dependencyNames and not dependency.startswith(
+                    "root-knob:"
+                ):
+                    self.error = "RuleError: unknown dependency '%s'" % dependency
+
+        if self.error is None:
+            # quick sanity check
+            if not "ret=" in content.replace(" ", ""):
+                self.error = "RuleError: rule must contain variable named 'ret'"
+
+            else:
+                try:
+                    self.code = compile(content, path, "exec")
+                except SyntaxError:
+                    self.error = traceback.format_exc()
+
+    def evaluate(self, context=None):
+        """
+        Run the rule, return True or False. Raises whatever the rule raises.
+        The launch context is available to the rule as a variable called 'context'.
+        """
+
+        scope = {"context": context}
+        exec(prefixCode, scope, scope)
+        exec(self.code, scope, scope)
+
+        return bool(scope["ret"])
+
+
+class DeclarativeRule(object):
+    """
+    A '_rule.json' file, parsed and with its regular expression compiled.
+    """
+
+    keys = ["ignoreClasses", "selection", "match", "classes", "name", "knobs"]
+
+    def __init__(self, path, content):
+        self.path = path
+        self.folder = os.path.dirname(path)
+        self.name = os.path.basename(self.folder)
+
+        self.ignoreClasses = False
+        self.error = None
+        self.depends = None
+
+        self.minimum = 0
+        self.maximum = None
+        self.matchAll = False
+        self.classes = None
+        self.namePattern = None
+        self.knobs = []
+
+        try:
+            self.parse(json.loads(content))
+        except (ValueError, TypeError, AttributeError, re.error) as error:
+            self.error = "RuleError: %s" % error
+
+    def parse(self, data):
+        """
+        Read the predicates from the decoded json data.
+        """
+
+        if not isinstance(data, dict):
+            raise ValueError("rule must be a json object")
+
+        for key in data.keys():
+            if key not in self.keys:
+                raise ValueError("unknown key '%s'" % key)
+
+        self.ignoreClasses = bool(int(data.get("ignoreClasses", 0)))
+
+        selection = data.get("selection", {})
+        self.minimum = int(selection.get("min", 0))
+        if selection.get("max") is not None:
+            self.maximum = int(selection["max"])
+
+        match = data.get("match", "any")
+        if match not in ["any", "all"]:
+            raise ValueError("'match' should be either 'any' or 'all'")
+        self.matchAll = match == "all"
+
+        if data.get("classes"):
+            # a single class would otherwise be split into its characters
+            if not isinstance(data["classes"], list):
+                raise ValueError("'classes' should be a list of node classes")
+            self.classes = frozenset(data["classes"])
+
+        if data.get("name"):
+            self.namePattern = re.compile(data["name"])
+
+        self.knobs = sorted(data.get("knobs", {}).items())
+
+    def nodeMatches(self, node):
+        """
+        Check a single node against the class, name and knob predicates.
+        """
+
+        if self.classes is not None and node.Class() not in self.classes:
+            return False
+
+        if self.namePattern is not None and not self.namePattern.search(node.name()):
+            return False
+
+        for knobName, value in self.knobs:
+            knob = node.knob(knobName)
+            if knob is None:
+                return False
+
+            knobValue = knob.value()
+            if knobValue != value and str(knobValue) != str(value):
+                return False
+
+        return True
+
+    def evaluate(self, context=None):
+        """
+        Return True or False. The cheapest predicates are checked first.
+        """
+
+        selection = context.selection if context is not None else []
+
+        # - selection size
+        if len(selection) < self.minimum:
+            return False
+
+        if self.maximum is not None and len(selection) > self.maximum:
+            return False
+
+        # a rule about the selected nodes never applies when nothing is selected, not even when
+        # matching all of them
+        if not selection and (
+            self.classes is not None or self.namePattern is not None or self.knobs
+        ):
+            return False
+
+        # - classes, without looking at the individual nodes
+        if self.classes is not None and context is not None:
+            selectedClasses = set(context.classes)
+
+            if self.matchAll:
+                if not selectedClasses <= self.classes:
+                    return False
+            elif self.classes.isdisjoint(selectedClasses):
+                return False
+
+        # - nodes
+        if self.namePattern is None and not self.knobs:
+            return True
+
+        if self.matchAll:
+            return all(self.nodeMatches(node) for node in selection)
+
+        return any(self.nodeMatches(node) for node in selection)
+
+
+class RuleTiming(object):
+    """
+    Durations of the most recent evaluations of a rule.
+    """
+
+    def __init__(self, size=20):
+        self.durations = deque(maxlen=size)
+
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.overBudget = 0
+
+    def add(self, duration):
+        self.durations.append(duration)
+
+        self.count += 1
+        self.total += duration
+        self.slowest = max(self.slowest, duration)
+
+    def average(self):
+        """
+        Return the rolling average of the most recent evaluations.
+        """
+
+        if not self.durations:
+            return 0.0
+
+        return sum(self.durations) / len(self.durations)
+
+
+class RuleEngine(object):
+    """
+    Evaluates the rules of all repositories for a launch. Results are remembered for as long as the
+    launch context lives, so building the hotbox and its submenus only runs every rule once.
+    """
+
+    def __init__(self, maxDependentResults=1024):
+        self.context = None
+        self.results = {}
+        self.timings = {}
+
+        # results of rules that declared their dependencies, kept across launches
+        self.dependentResults = OrderedDict()
+        self.maxDependentResults = maxDependentResults
+
+        # statistics
+        self.evaluations = 0
+        self.memoHits = 0
+        self.dependencyHits = 0
+
+        # provides the rules of repositories loaded in the background (see W_hotboxLoader)
+        self.loader = None
+
+        # rule files that are skipped for the rest of the session, for being too slow
+        self.disabled = set()
+
+    def getRule(self, ruleFile):
+        """
+        Return the CompiledRule (or DeclarativeRule for json files) of a rule file, or None if the file
+        doesn't exist.
+        """
+
+        if self.loader is not None:
+            return self.loader.getRule(ruleFile)
+
+        return readRule(ruleFile)
+
+    def validate(
+        self, ruleFile, context=None, reportError=None, budget=None, reportSlow=None
+    ):
+        """
+        Return whether a single rule applies to the context. Errors are passed to reportError, a
+        callable taking the formatted error and the path of the rule file, and make the rule fail.
+        Every evaluation is timed. When a rule takes longer than budget (in seconds), reportSlow gets
+        called with the path of the rule file, the duration and the RuleTiming of the rule.
+        """
+
+        rule = self.getRule(ruleFile)
+        if rule is None:
+            return False
+
+        # results only stay valid for the context they were computed for
+        if context is None or self.context is None or self.context() is not context:
+            self.context = weakref.ref(context) if context is not None else None
+            self.results = {}
+
+        result = self.results.get(ruleFile)
+        if result is not None and result[0] is rule:
+            self.memoHits += 1
+            return result[1]
+
+        error = rule.error
+
+        # reuse the outcome of the last evaluation if none of the declared inputs changed
+        dependencyKey = None
+        if not error and rule.depends is not None and context is not None:
+            dependencyKey = self.dependencyKey(rule.depends, context)
+
+            result = self.dependentResults.pop((ruleFile, dependencyKey), None)
+            if result is not None and result[0] is rule:
+                self.dependentResults[(ruleFile, dependencyKey)] = result
+                self.dependencyHits += 1
+                self.results[ruleFile] = result
+                return result[1]
+
+        if not error:
+            self.evaluations += 1
+
+            startTime = timer()
+            try:
+                valid = rule.evaluate(context)
+            except:
+                error = traceback.format_exc()
+            duration = timer() - startTime
+
+            timing = self.timings.get(ruleFile)
+            if timing is None:
+                timing = self.timings[ruleFile] = RuleTiming()
+            timing.add(duration)
+
+            if budget and duration > budget:
+                timing.overBudget += 1
+                if reportSlow is not None:
+                    reportSlow(ruleFile, duration, timing)
+
+        if error:
+            if reportError is not None:
+                reportError(error, ruleFile)
+            valid = False
+
+        elif dependencyKey is not None:
+            self.dependentResults[(ruleFile, dependencyKey)] = (rule, valid)
+            while len(self.dependentResults) > self.maxDependentResults:
+                self.dependentResults.popitem(last=False)
+
+        self.results[ruleFile] = (rule, valid)
+
+        return valid
+
+    def dependencyKey(self, depends, context):
+        """
+        Return the current values of the inputs a rule depends on.
+        """
+
+        values = []
+
+        for dependency in depends:
+            if dependency == "selection":
+                value = tuple(node.fullName() for node in context.selection)
+            elif dependency == "selection-count":
+                value = len(context.selection)
+            elif dependency == "selection-classes":
+                value = tuple(sorted(context.classes))
+            elif dependency == "group":
+                value = context.groupRoot
+            elif dependency.startswith("root-knob:"):
+                import nuke
+
+                knob = nuke.root().knob(dependency.split(":", 1)[1])
+                value = knob.toScript() if knob is not None else None
+            else:
+                value = None
+
+            values.append(value)
+
+        return tuple(values)
+
+    def evaluate(
+        self, rules, context=None, reportError=None, budget=None, reportSlow=None
+    ):
+        """
+        Evaluate a list of (rule folder, rule file) in one go. Returns the folders of the rules that apply,
+        and whether any of those rules asks for the classes of the selection to be ignored.
+        """
+
+        validRules = []
+        ignoreClasses = False
+
+        for ruleFolder, ruleFile in rules:
+            if ruleFile in self.disabled:
+                continue
+
+            if self.validate(ruleFile, context, reportError, budget, reportSlow):
+                validRules.append(ruleFolder)
+                ignoreClasses = ignoreClasses or self.results[ruleFile][0].ignoreClasses
+
+        return validRules, ignoreClasses
+
+    def slowestRules(self):
+        """
+        Return a list of (rule file, RuleTiming), slowest rolling average first.
+        """
+
+        return sorted(
+            self.timings.items(), key=lambda item: item[1].average(), reverse=True
+        )
+
+    def statistics(self):
+        """
+        Return a dictionary describing how well the engine performed so far.
+        """
+
+        return {
+            "evaluations": self.evaluations,
+            "memoHits": self.memoHits,
+            "dependencyHits": self.dependencyHits,
+            "disabled": len(self.disabled),
+        }
+
+
+def readRule(ruleFile):
+    """
+    Read the CompiledRule (or DeclarativeRule for json files) of a rule file from disk, or None if the
+    file doesn't exist.
+    """
+
+    if ruleFile.endswith(".json"):
+        return W_hotboxCache.fileCache.get(ruleFile, DeclarativeRule)
+
+    return W_hotboxCache.fileCache.get(ruleFile, CompiledRule)
+
+
+# - shared engine
+
+ruleEngine = RuleEngine()
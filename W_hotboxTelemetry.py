@@ -0,0 +1,230 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox telemetry
+#
+# Keeps track of every button that gets invoked: how long it took, whether it raised an error and how
+# many nodes were selected. Invocations are appended to a SQLite database by a background thread, so
+# clicking a button never waits for the disk. When the database can't be written, invocations are dropped
+# rather than getting in the way of the artist.
+#
+# The statistics (median and 95th percentile duration, error rate) are shown by the manager, to find the
+# buttons that make artists wait. Only the most recent invocations of every button are kept.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import math
+import time
+import sqlite3
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+timer = getattr(time, "perf_counter", time.time)
+
+tableDefinition = """CREATE TABLE IF NOT EXISTS invocations (
+    time REAL,
+    path TEXT,
+    duration REAL,
+    raised INTEGER,
+    selection INTEGER
+)"""
+
+
+class ButtonStatistics(object):
+    """
+    Summary of the most recent invocations of a single button.
+    """
+
+    __slots__ = ["count", "errors", "median", "percentile95", "lastUsed"]
+
+    def __init__(self, durations, errors, lastUsed):
+        durations = sorted(durations)
+
+        self.count = len(durations)
+        self.errors = errors
+        self.median = percentile(durations, 0.5)
+        self.percentile95 = percentile(durations, 0.95)
+        self.lastUsed = lastUsed
+
+    def errorRate(self):
+        return float(self.errors) / self.count if self.count else 0.0
+
+    def describe(self):
+        return "p50 %.1f ms, p95 %.1f ms, %i invocations, %.0f%% errors" % (
+            self.median * 1000,
+            self.percentile95 * 1000,
+            self.count,
+            self.errorRate() * 100,
+        )
+
+
+def prefixEnd(prefix):
+    """
+    Return the smallest string larger than every string starting with prefix.
+    """
+
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def percentile(durations, fraction):
+    """
+    Return the value at fraction of a sorted list, using the nearest rank.
+    """
+
+    if not durations:
+        return 0.0
+
+    index = int(math.ceil(fraction * len(durations))) - 1
+    return durations[min(max(index, 0), len(durations) - 1)]
+
+
+class TelemetryStore(object):
+    """
+    Append only store of button invocations, written on a background thread.
+    """
+
+    # only the most recent invocations of a button are kept
+    maxSamples = 1000
+
+    def __init__(self, path):
+        self.path = path
+
+        self.records = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, path, duration, raised, selectionSize):
+        """
+        Store a single invocation of the button stored at path.
+        """
+
+        self.records.put(
+            (time.time(), path, duration, 1 if raised else 0, selectionSize)
+        )
+
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run)
+                self.thread.daemon = True
+                self.thread.start()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        connection.execute(tableDefinition)
+
+        # replaced by an index that keeps the invocations of every button in order
+        connection.execute("DROP INDEX IF EXISTS invocationsPath")
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS invocationsPathTime ON invocations (path, time)"
+        )
+
+        # remove whatever was left over by sessions before the history was capped
+        paths = connection.execute("SELECT DISTINCT path FROM invocations").fetchall()
+        with connection:
+            self.compact(connection, [row[0] for row in paths])
+
+        return connection
+
+    def compact(self, connection, paths):
+        """
+        Remove all but the most recent maxSamples invocations of the buttons stored at paths.
+        """
+
+        for path in paths:
+            connection.execute(
+                "DELETE FROM invocations WHERE path = ? AND time < (SELECT time FROM invocations "
+                "WHERE path = ? ORDER BY time DESC LIMIT 1 OFFSET ?)",
+                (path, path, self.maxSamples - 1),
+            )
+
+    def run(self):
+        """
+        Write the recorded invocations. Runs on the telemetry thread.
+        """
+
+        connection = None
+
+        while True:
+            rows = [self.records.get()]
+
+            # whatever got recorded in the meantime is written in one go
+            while True:
+                try:
+                    rows.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                if connection is None:
+                    connection = self.connect()
+
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO invocations VALUES (?, ?, ?, ?, ?)", rows
+                    )
+                    self.compact(connection, set(row[1] for row in rows))
+                self.written += len(rows)
+
+            except (sqlite3.Error, OSError):
+                connection = None
+                self.dropped += len(rows)
+
+            for row in rows:
+                self.records.task_done()
+
+    def flush(self):
+        """
+        Wait until everything recorded so far got written.
+        """
+
+        self.records.join()
+
+    def statistics(self, folder=""):
+        """
+        Return the statistics of every button stored in folder, by path.
+        """
+
+        if not os.path.exists(self.path):
+            return {}
+
+        query = "SELECT path, duration, raised, time FROM invocations"
+        arguments = ()
+
+        # a range rather than a prefix match, so the index can be used
+        if folder:
+            query += " WHERE path >= ? AND path < ?"
+            arguments = (folder, prefixEnd(folder))
+
+        samples = {}
+
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            for path, duration, raised, invoked in connection.execute(
+                query + " ORDER BY path, time", arguments
+            ):
+                samples.setdefault(path, []).append((duration, raised, invoked))
+
+        except sqlite3.Error:
+            return {}
+
+        finally:
+            connection.close()
+
+        statistics = {}
+
+        for path, invocations in samples.items():
+            # invocations written since the history was last compacted
+            invocations = invocations[-self.maxSamples :]
+
+            statistics[path] = ButtonStatistics(
+                [invocation[0] for invocation in invocations],
+                sum(invocation[1] for invocation in invocations),
+                invocations[-1][2],
+            )
+
+        return statistics
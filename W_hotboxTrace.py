@@ -0,0 +1,150 @@
+# ----------------------------------------------------------------------------------------------------------
+# W_hotbox trace
+#
+# Records how long the phases of launching the hotbox and invoking a button take. Phases are marked as
+# spans:
+#
+#   with W_hotboxTrace.span("rules"):
+#       ...
+#
+# Spans end up in a ring buffer holding the most recent events, which can be exported as a Chrome trace
+# (open it in chrome://tracing or https://ui.perfetto.dev). When tracing is disabled, span() returns the
+# same object doing nothing, so instrumented code costs a function call and an attribute lookup.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import json
+import time
+import threading
+
+from collections import deque
+
+timer = getattr(time, "perf_counter", time.time)
+
+enabled = False
+events = deque(maxlen=10000)
+
+# all timestamps are relative to the moment the module was loaded
+origin = timer()
+
+
+class Span(object):
+    """
+    A phase being timed, recorded when it ends.
+    """
+
+    __slots__ = ["name", "category", "args", "start"]
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = timer()
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        events.append(
+            (
+                "X",
+                self.name,
+                self.category,
+                self.start,
+                timer() - self.start,
+                threading.current_thread().ident,
+                self.args,
+            )
+        )
+        return False
+
+
+class NullSpan(object):
+    """
+    Stand-in for a span while tracing is disabled.
+    """
+
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        return False
+
+
+nullSpan = NullSpan()
+
+
+def span(name, category="launch", **args):
+    """
+    Return a context manager timing a phase, named name.
+    """
+
+    if not enabled:
+        return nullSpan
+
+    return Span(name, category, args)
+
+
+def instant(name, category="launch", **args):
+    """
+    Record a single moment in time, like the first paint of the hotbox.
+    """
+
+    if enabled:
+        events.append(
+            ("i", name, category, timer(), 0.0, threading.current_thread().ident, args)
+        )
+
+
+def setEnabled(state):
+    global enabled
+    enabled = bool(state)
+
+
+def clear():
+    events.clear()
+
+
+def chromeTrace():
+    """
+    Return the recorded events in the Chrome trace event format.
+    """
+
+    processId = os.getpid()
+    traceEvents = []
+
+    for phase, name, category, start, duration, threadId, args in list(events):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": phase,
+            "ts": (start - origin) * 1000000.0,
+            "pid": processId,
+            "tid": threadId,
+            "args": args,
+        }
+
+        if phase == "X":
+            event["dur"] = duration * 1000000.0
+        else:
+            event["s"] = "t"
+
+        traceEvents.append(event)
+
+    return {"traceEvents": traceEvents, "displayTimeUnit": "ms"}
+
+
+def export(path):
+    """
+    Write the recorded events to a Chrome trace file. Returns the amount of events written.
+    """
+
+    trace = chromeTrace()
+
+    with open(path, "w") as traceFile:
+        json.dump(trace, traceFile)
+
+    return len(trace["traceEvents"])
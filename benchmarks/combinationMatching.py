@@ -0,0 +1,126 @@
+# ----------------------------------------------------------------------------------------------------------
+# Benchmark: matching a multi-class selection against the class combinations stored in 'Multiple'.
+#
+# Compares the original approach (intersect the selection with every combination folder) with the
+# inverted index of the catalog.
+#
+# usage: python benchmarks/combinationMatching.py [combinations] [selection size] [repeats]
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import W_hotboxCatalog
+
+
+def createRepository(location, combinationAmount, classAmount, seed=0):
+    """
+    Create a repository with a 'Multiple' folder containing a set of random class combinations.
+    """
+
+    random.seed(seed)
+
+    allClasses = ["Class%s" % str(index).zfill(3) for index in range(classAmount)]
+
+    os.mkdir(location + "Multiple")
+
+    combinations = set()
+    while len(combinations) < combinationAmount:
+        size = random.randint(2, 25)
+        combinations.add("-".join(sorted(random.sample(allClasses, size))))
+
+    for combination in combinations:
+        os.mkdir(location + "Multiple/" + combination)
+
+    return allClasses
+
+
+def matchLinear(repository, nodeClass):
+    """
+    The way NodeButtons used to match a selection against the combinations.
+    """
+
+    result = []
+    for managerNodeClasses in [
+        i for i in sorted(os.listdir(repository + "Multiple")) if i[0] not in ["_", "."]
+    ]:
+        managerNodeClassesList = managerNodeClasses.split("-")
+        match = list(set(nodeClass).intersection(managerNodeClassesList))
+
+        if len(match) >= len(nodeClass):
+            result.append(repository + "Multiple/" + managerNodeClasses)
+
+    return result
+
+
+def timeFunction(function, repeats):
+    startTime = time.time()
+    for i in range(repeats):
+        result = function()
+    return (time.time() - startTime) / repeats, result
+
+
+def main(combinationAmount=1000, selectionSize=20, repeats=200):
+    location = tempfile.mkdtemp() + "/"
+
+    try:
+        allClasses = createRepository(location, combinationAmount, 60)
+
+        # a selection that is a subset of one of the combinations, so there is at least a single match,
+        # and a selection of random classes.
+        random.seed(1)
+        combination = max(os.listdir(location + "Multiple"), key=len).split("-")
+        subsetSelection = random.sample(
+            combination, min(selectionSize, len(combination))
+        )
+        selection = random.sample(allClasses, selectionSize)
+
+        catalog = W_hotboxCatalog.RepositoryCatalog(location)
+
+        print(
+            "%s combinations, selection of %s classes, %s repeats"
+            % (combinationAmount, selectionSize, repeats)
+        )
+
+        for name, nodeClass in [
+            ("matching selection", subsetSelection),
+            ("random selection", selection),
+        ]:
+            linearTime, linearResult = timeFunction(
+                lambda: matchLinear(location, nodeClass), repeats
+            )
+
+            coldStart = time.time()
+            catalog.invalidate()
+            catalog.matchCombinations(nodeClass)
+            coldTime = time.time() - coldStart
+
+            indexTime, indexResult = timeFunction(
+                lambda: catalog.matchCombinations(nodeClass), repeats
+            )
+
+            assert sorted(linearResult) == sorted(indexResult)
+
+            print(
+                "%-20s linear: %8.3f ms   index (cold): %8.3f ms   index (warm): %8.3f ms   matches: %s"
+                % (
+                    name,
+                    linearTime * 1000,
+                    coldTime * 1000,
+                    indexTime * 1000,
+                    len(indexResult),
+                )
+            )
+
+    finally:
+        shutil.rmtree(location)
+
+
+if __name__ == "__main__":
+    main(*[int(i) for i in sys.argv[1:]])
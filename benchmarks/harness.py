@@ -0,0 +1,147 @@
+# ----------------------------------------------------------------------------------------------------------
+# Runs the hotbox outside of Nuke: the nuke stand-in, an offscreen QApplication and a temporary home folder
+# holding the preferences and synthetic repositories.
+#
+# PySide2 has to be installed. Widgets are rendered offscreen, so no display is needed.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+import shutil
+import tempfile
+
+benchmarkFolder = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchmarkFolder))
+
+import nukeStub
+import syntheticRepository
+
+
+class Repositories(object):
+    """
+    A generated repository and its extra repositories.
+    """
+
+    def __init__(self, repository, extraRepositories, classes):
+        self.repository = repository
+        self.extraRepositories = extraRepositories
+        self.classes = classes
+
+        # a selection matching a class combination and the rules, so every part of the hotbox is used
+        combinations = sorted(os.listdir(repository + "Multiple"))
+        self.selection = combinations[0].split("-") if combinations else classes[:1]
+
+
+class Harness(object):
+    """
+    Sets up the environment the hotbox needs, and imports it.
+    """
+
+    def __init__(self):
+        self.folder = tempfile.mkdtemp(prefix="W_hotboxBenchmark").replace("\\", "/")
+
+        os.makedirs(self.folder + "/.nuke")
+        os.environ["HOME"] = self.folder
+        os.environ["QT_QPA_PLATFORM"] = os.environ.get("QT_QPA_PLATFORM", "offscreen")
+
+        # only the generated repositories are used
+        os.environ.pop("W_HOTBOX_REPO_PATHS", None)
+        os.environ.pop("W_HOTBOX_REPO_NAMES", None)
+
+        nukeStub.install()
+
+        # preferences Nuke defines itself, or the hotbox expects to be set
+        for knob, value in [
+            (nukeStub.String_Knob("UIFont"), "Verdana"),
+            (nukeStub.File_Knob("hotboxLocation"), self.folder + "/repository/"),
+        ]:
+            knob.setValue(value)
+            nukeStub.preferences.addKnob(knob)
+
+        from PySide2 import QtWidgets
+
+        self.application = QtWidgets.QApplication.instance()
+        if self.application is None:
+            self.application = QtWidgets.QApplication([])
+
+        import W_hotbox
+        import W_hotboxManager
+        import W_hotboxCatalog
+        import W_hotboxCache
+
+        self.hotbox = W_hotbox
+        self.manager = W_hotboxManager
+        self.catalog = W_hotboxCatalog
+        self.cache = W_hotboxCache
+
+        # read every repository on the thread being timed
+        nukeStub.preferences.knob("hotboxBackgroundLoading").setValue(False)
+
+    def createRepositories(self, name, extraRepositories=0, **settings):
+        """
+        Generate a repository (and extra repositories) with the given settings, see
+        syntheticRepository.createRepository.
+        """
+
+        location = "%s/%s/" % (self.folder, name)
+
+        classes = syntheticRepository.createRepository(
+            location + "repository", **settings
+        )
+
+        extras = []
+        for index in range(extraRepositories):
+            path = "%sextra%s/" % (location, index)
+            settings["seed"] = index + 1
+            syntheticRepository.createRepository(path, **settings)
+            extras.append(["extra%s" % index, path])
+
+        return Repositories(location + "repository/", extras, classes)
+
+    def use(self, repositories):
+        """
+        Point the hotbox at a set of repositories and forget everything cached.
+        """
+
+        nukeStub.preferences.knob("hotboxLocation").setValue(repositories.repository)
+        self.hotbox.extraRepositories[:] = repositories.extraRepositories
+
+        self.select(repositories.selection)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Forget every cached listing and file.
+        """
+
+        self.catalog.invalidateCatalogs()
+        self.cache.fileCache.invalidate()
+        self.cache.codeCache.invalidate()
+
+    def select(self, classes):
+        """
+        Select a node of every class.
+        """
+
+        nukeStub.select(
+            [
+                nukeStub.Node(nodeClass, "%s%s" % (nodeClass, index + 1))
+                for index, nodeClass in enumerate(classes)
+            ]
+        )
+
+    def copyRepository(self, repository):
+        """
+        Return a scratch copy of a repository, to run something destructive on.
+        """
+
+        scratch = tempfile.mkdtemp(dir=self.folder).replace("\\", "/")
+        shutil.copytree(repository, scratch + "/repository")
+
+        return scratch + "/repository/"
+
+    def processEvents(self):
+        self.application.processEvents()
+
+    def cleanUp(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
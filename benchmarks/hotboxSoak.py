@@ -0,0 +1,118 @@
+# ----------------------------------------------------------------------------------------------------------
+# Soak test for the memory used by the hotbox and the manager.
+#
+# Opens and closes the hotbox many times, alternating between selections so hotboxes get reused as well
+# as rebuilt, and opens the manager a number of times. Memory is sampled at regular intervals (after a
+# warm up, once deleted widgets are gone), and has to stay flat: fails when Python allocations grow more
+# than the allowed amount, or when any widgets are left behind.
+#
+# usage: python benchmarks/hotboxSoak.py [launches] [managerCycles] [allowedGrowthKB]
+# ----------------------------------------------------------------------------------------------------------
+
+import gc
+import sys
+
+import harness as hotboxHarness
+
+import W_hotboxMemory
+
+
+def settle(harness):
+    """
+    Let Qt delete the widgets that were deleted later, and Python collect whatever is left.
+    """
+
+    from PySide2 import QtCore
+
+    harness.processEvents()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    gc.collect()
+
+
+def sample(harness, monitor, label):
+    from PySide2 import QtWidgets
+
+    settle(harness)
+    print(monitor.sample(label, QtWidgets.QApplication.allWidgets()))
+
+
+def soakHotbox(harness, repositories, monitor, launches, interval):
+    W_hotbox = harness.hotbox
+
+    selections = [repositories.selection, repositories.classes[:1]]
+
+    for launch in range(launches):
+        harness.select(selections[launch % len(selections)])
+
+        W_hotbox.showHotbox()
+        W_hotbox.hotboxInstance.closeHotbox()
+
+        if launch % 10 == 0:
+            harness.processEvents()
+
+        if launch % interval == 0:
+            sample(harness, monitor, "launch")
+
+
+def soakManager(harness, repositories, monitor, cycles):
+    W_hotboxManager = harness.manager
+
+    for cycle in range(cycles):
+        W_hotboxManager.showHotboxManager(repositories.repository)
+        harness.processEvents()
+
+        sample(harness, monitor, "manager")
+
+    W_hotboxManager.hotboxManagerInstance.closeManager()
+
+
+def main(launches=10000, managerCycles=100, allowedGrowth=512):
+    harness = hotboxHarness.Harness()
+
+    try:
+        repositories = harness.createRepositories("soak", classes=20)
+        harness.use(repositories)
+
+        # fill the caches and pools before measuring
+        warmUp = min(100, launches)
+        soakHotbox(
+            harness, repositories, W_hotboxMemory.MemoryMonitor(), warmUp, warmUp
+        )
+
+        monitor = W_hotboxMemory.MemoryMonitor()
+        monitor.start()
+
+        soakHotbox(harness, repositories, monitor, launches, max(1, launches // 20))
+        soakManager(harness, repositories, monitor, managerCycles)
+
+        failures = []
+
+        for label in ["launch", "manager"]:
+            traced, widgets = monitor.retained(label)
+
+            if traced > allowedGrowth * 1024:
+                failures.append(
+                    "%s: %s retained" % (label, W_hotboxMemory.formatBytes(traced))
+                )
+
+            leftBehind = dict(
+                (name, amount) for name, amount in widgets.items() if amount > 0
+            )
+            if leftBehind:
+                failures.append("%s: widgets left behind %s" % (label, leftBehind))
+
+        monitor.stop()
+
+    finally:
+        harness.cleanUp()
+
+    if failures:
+        print("\nmemory did not stay flat:\n" + "\n".join(failures))
+        return 1
+
+    print("\nmemory stayed flat")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(i) for i in sys.argv[1:]]))
@@ -0,0 +1,376 @@
+# ----------------------------------------------------------------------------------------------------------
+# Headless benchmark suite for the hotbox and the manager.
+#
+# Generates synthetic repositories at a number of scales and times building the buttons of the hotbox
+# (with and without anything cached), constructing the hotbox, validating rules, populating the tree of
+# the manager, repairing a repository and exporting and importing archives. Every benchmark reports the
+# median of a number of runs.
+#
+# The results are compared against a stored baseline, any benchmark getting slower than the tolerance
+# allows fails the suite. Baselines are specific to a machine, store one with --update-baseline.
+#
+# usage: python benchmarks/hotboxSuite.py [--scales small,medium,large] [--update-baseline]
+#                                         [--baseline path] [--tolerance 0.25]
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from collections import OrderedDict
+
+import harness as hotboxHarness
+
+timer = getattr(time, "perf_counter", time.time)
+
+defaultBaseline = hotboxHarness.benchmarkFolder + "/baseline.json"
+
+# differences smaller than this (in seconds) are considered noise, regardless of the tolerance
+minimumDifference = 0.001
+
+scales = OrderedDict(
+    [
+        (
+            "small",
+            dict(
+                classes=20,
+                combinations=10,
+                rules=5,
+                buttons=6,
+                submenus=2,
+                depth=1,
+                extraRepositories=0,
+            ),
+        ),
+        (
+            "medium",
+            dict(
+                classes=100,
+                combinations=100,
+                rules=20,
+                buttons=10,
+                submenus=2,
+                depth=2,
+                extraRepositories=1,
+            ),
+        ),
+        (
+            "large",
+            dict(
+                classes=200,
+                combinations=400,
+                rules=60,
+                buttons=12,
+                submenus=2,
+                depth=2,
+                extraRepositories=2,
+            ),
+        ),
+    ]
+)
+
+
+def measure(function, repeats=10, setUp=None, tearDown=None):
+    """
+    Return the median duration of function, in seconds. setUp is called before every run and its
+    result is passed to function, the result of function is passed to tearDown. Neither is timed.
+    """
+
+    durations = []
+
+    for repeat in range(repeats):
+        argument = setUp() if setUp else None
+
+        startTime = timer()
+        result = function(argument) if setUp else function()
+        durations.append(timer() - startTime)
+
+        if tearDown:
+            tearDown(result)
+
+    durations.sort()
+    middle = len(durations) // 2
+
+    if len(durations) % 2:
+        return durations[middle]
+    return (durations[middle - 1] + durations[middle]) / 2.0
+
+
+# - Benchmarks
+
+
+def benchmarkNodeButtons(harness, repositories):
+    """
+    Collect the items of both halves of the hotbox, once everything got cached.
+    """
+
+    W_hotbox = harness.hotbox
+
+    def run():
+        context = W_hotbox.LaunchContext()
+        W_hotbox.NodeButtons(context=context, build=False)
+        W_hotbox.NodeButtons("bottom", context=context, build=False)
+
+    run()
+    return measure(run, 50)
+
+
+def benchmarkNodeButtonsCold(harness, repositories):
+    """
+    Collect the items of both halves of the hotbox, reading everything from disk.
+    """
+
+    W_hotbox = harness.hotbox
+
+    def run(context):
+        W_hotbox.NodeButtons(context=context, build=False)
+        W_hotbox.NodeButtons("bottom", context=context, build=False)
+
+    def setUp():
+        harness.invalidate()
+        return W_hotbox.LaunchContext()
+
+    return measure(run, 10, setUp)
+
+
+def benchmarkHotbox(harness, repositories):
+    """
+    Construct the hotbox, including its buttons.
+    """
+
+    W_hotbox = harness.hotbox
+
+    def run(context):
+        return W_hotbox.Hotbox(context=context)
+
+    def tearDown(hotbox):
+        hotbox.close()
+        hotbox.deleteLater()
+        harness.processEvents()
+
+    tearDown(run(W_hotbox.LaunchContext()))
+    return measure(run, 20, W_hotbox.LaunchContext, tearDown)
+
+
+def benchmarkValidateRule(harness, repositories):
+    """
+    Validate every rule of every repository for a new selection.
+    """
+
+    W_hotbox = harness.hotbox
+
+    ruleFiles = []
+    for repository in [repositories.repository] + [
+        path for name, path in repositories.extraRepositories
+    ]:
+        rulesFolder = repository + "Rules/"
+        for rule in sorted(os.listdir(rulesFolder)):
+            for ruleName in ["_rule.py", "_rule.json"]:
+                if os.path.exists(rulesFolder + rule + "/" + ruleName):
+                    ruleFiles.append(rulesFolder + rule + "/" + ruleName)
+
+    nodeButtons = W_hotbox.NodeButtons(build=False)
+
+    def run(context):
+        for ruleFile in ruleFiles:
+            nodeButtons.validateRule(ruleFile, context)
+
+    return measure(run, 20, W_hotbox.LaunchContext)
+
+
+def benchmarkPopulateTree(harness, repositories):
+    """
+    Fill the tree of the manager with the buttons of a class.
+    """
+
+    manager = harness.manager.HotboxManager(repositories.repository)
+    manager.classesList.setCurrentRow(0)
+
+    duration = measure(manager.hotboxItemsTree.populateTree, 20)
+
+    manager.close()
+    manager.deleteLater()
+    harness.processEvents()
+
+    return duration
+
+
+def benchmarkRepairHotbox(harness, repositories):
+    """
+    Repair every section of a repository.
+    """
+
+    repository = harness.copyRepository(repositories.repository)
+
+    def run():
+        for section in ["Single", "Multiple", "All", "Rules"]:
+            harness.manager.RepairHotbox(repository + section, message=False)
+
+    return measure(run, 3)
+
+
+def benchmarkArchives(harness, repositories):
+    """
+    Export a repository to an archive, and import that archive in a copy of the repository.
+    Returns the durations of both.
+    """
+
+    nukeStub = hotboxHarness.nukeStub
+
+    archive = harness.folder + "/benchmark.hotbox"
+
+    exporter = harness.manager.HotboxManager(repositories.repository)
+
+    def export():
+        nukeStub.filenames.append(archive)
+        exporter.exportHotboxArchive()
+
+    exportDuration = measure(export, 3)
+
+    importer = harness.manager.HotboxManager(
+        harness.copyRepository(repositories.repository)
+    )
+
+    def run():
+        nukeStub.filenames.append(archive)
+        importer.importHotboxArchive()
+
+    importDuration = measure(run, 3)
+
+    for manager in [exporter, importer]:
+        manager.close()
+        manager.deleteLater()
+    harness.processEvents()
+
+    return exportDuration, importDuration
+
+
+def runScale(harness, scale):
+    """
+    Run every benchmark on a repository of the given scale. Returns the durations by benchmark name.
+    """
+
+    repositories = harness.createRepositories(scale, **scales[scale])
+    harness.use(repositories)
+
+    results = OrderedDict()
+
+    for name, benchmark in [
+        ("nodeButtons", benchmarkNodeButtons),
+        ("nodeButtonsCold", benchmarkNodeButtonsCold),
+        ("hotbox", benchmarkHotbox),
+        ("validateRule", benchmarkValidateRule),
+        ("populateTree", benchmarkPopulateTree),
+        ("repairHotbox", benchmarkRepairHotbox),
+    ]:
+        results[name] = benchmark(harness, repositories)
+        harness.invalidate()
+
+    results["archiveExport"], results["archiveImport"] = benchmarkArchives(
+        harness, repositories
+    )
+
+    return results
+
+
+# - Baseline
+
+
+def readBaseline(path):
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as baselineFile:
+        return json.load(baselineFile)
+
+
+def writeBaseline(path, results):
+    with open(path, "w") as baselineFile:
+        json.dump(results, baselineFile, indent=4, sort_keys=True)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the results next to the baseline. Returns the names of the benchmarks that regressed.
+    """
+
+    regressions = []
+
+    print("%-30s %12s %12s %8s" % ("benchmark", "ms", "baseline", "change"))
+
+    for name, duration in results.items():
+        reference = baseline.get(name)
+
+        if reference is None:
+            print("%-30s %12.3f %12s %8s" % (name, duration * 1000, "-", "-"))
+            continue
+
+        change = (duration - reference) / reference if reference else 0.0
+        regressed = (
+            duration > reference * (1 + tolerance)
+            and duration - reference > minimumDifference
+        )
+
+        print(
+            "%-30s %12.3f %12.3f %+7.1f%%%s"
+            % (
+                name,
+                duration * 1000,
+                reference * 1000,
+                change * 100,
+                " REGRESSION" if regressed else "",
+            )
+        )
+
+        if regressed:
+            regressions.append(name)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="W_hotbox benchmark suite")
+    parser.add_argument("--scales", default=",".join(scales.keys()))
+    parser.add_argument("--baseline", default=defaultBaseline)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    arguments = parser.parse_args()
+
+    harness = hotboxHarness.Harness()
+
+    results = OrderedDict()
+    try:
+        for scale in arguments.scales.split(","):
+            for name, duration in runScale(harness, scale).items():
+                results["%s/%s" % (scale, name)] = duration
+    finally:
+        harness.cleanUp()
+
+    baseline = readBaseline(arguments.baseline)
+
+    if arguments.update_baseline:
+        baseline.update(results)
+        writeBaseline(arguments.baseline, baseline)
+        compare(results, {}, arguments.tolerance)
+        print("\nbaseline written to %s" % arguments.baseline)
+        return 0
+
+    if not baseline:
+        print("no baseline found, store one with --update-baseline\n")
+
+    regressions = compare(results, baseline, arguments.tolerance)
+
+    if regressions:
+        print(
+            "\n%s benchmark(s) regressed: %s"
+            % (len(regressions), ", ".join(regressions))
+        )
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+# ----------------------------------------------------------------------------------------------------------
+# Stand-in for the nuke module, good enough to run the hotbox and the manager outside of Nuke.
+#
+# Covers the preferences node, the selection, nodes and knobs, undo, menus and the dialogs the hotbox
+# uses. Dialogs don't show anything: getFilename returns whatever was queued in 'filenames', ask always
+# answers yes. Install it before importing W_hotbox:
+#
+#   import nukeStub
+#   nukeStub.install()
+# ----------------------------------------------------------------------------------------------------------
+
+import sys
+
+NUKE_VERSION_MAJOR = 12
+NUKE_VERSION_MINOR = 2
+NUKE_VERSION_STRING = "12.2v1"
+
+GUI = True
+
+STARTLINE = 0x1000
+TO_SCRIPT = 0x01
+TO_VALUE = 0x02
+WRITE_NON_DEFAULT_ONLY = 0x04
+WRITE_USER_KNOB_DEFS = 0x08
+
+# answers to getFilename, first in first out
+filenames = []
+
+# everything that was printed with tprint or shown with message
+output = []
+
+
+# - Knobs
+
+
+class Knob(object):
+    """
+    A knob holding a single value.
+    """
+
+    defaultValue = ""
+
+    def __init__(self, name, label=None, *args):
+        self._name = name
+        self._label = label if label is not None else name
+        self._value = self.defaultValue
+        self._flags = 0
+        self._tooltip = ""
+        self._visible = True
+        self._enabled = True
+
+    def name(self):
+        return self._name
+
+    def label(self):
+        return self._label
+
+    def value(self):
+        return self._value
+
+    def getValue(self):
+        return self._value
+
+    def setValue(self, value):
+        self._value = value
+
+    def toScript(self):
+        return str(self._value)
+
+    def setFlag(self, flag):
+        self._flags |= flag
+
+    def clearFlag(self, flag):
+        self._flags &= ~flag
+
+    def setTooltip(self, tooltip):
+        self._tooltip = tooltip
+
+    def setVisible(self, visible):
+        self._visible = visible
+
+    def setEnabled(self, enabled):
+        self._enabled = enabled
+
+
+class Boolean_Knob(Knob):
+    defaultValue = False
+
+    def value(self):
+        return bool(self._value)
+
+
+class Int_Knob(Knob):
+    defaultValue = 0
+
+    def value(self):
+        return int(self._value)
+
+
+class ColorChip_Knob(Knob):
+    defaultValue = 0
+
+
+class String_Knob(Knob):
+    pass
+
+
+class File_Knob(Knob):
+    pass
+
+
+class Text_Knob(Knob):
+    pass
+
+
+class Tab_Knob(Knob):
+    pass
+
+
+class PyScript_Knob(Knob):
+    pass
+
+
+class Enumeration_Knob(Knob):
+    """
+    value() returns the selected item, getValue() its index.
+    """
+
+    defaultValue = 0
+
+    def __init__(self, name, label=None, values=None):
+        super(Enumeration_Knob, self).__init__(name, label)
+        self._values = list(values or [])
+
+    def value(self):
+        if not self._values:
+            return ""
+        return self._values[int(self._value)]
+
+    def getValue(self):
+        return int(self._value)
+
+    def setValue(self, value):
+        if value in self._values:
+            value = self._values.index(value)
+        self._value = value
+
+    def values(self):
+        return list(self._values)
+
+
+# - Nodes
+
+
+class Node(object):
+    """
+    A node with a class, a name and a set of knobs.
+    """
+
+    def __init__(self, nodeClass="NoOp", name=None, knobs=None, parent="root"):
+        self._class = nodeClass
+        self._name = name or nodeClass + "1"
+        self._parent = parent
+        self._knobs = {}
+
+        self.addKnob(ColorChip_Knob("tile_color"))
+
+        for knobName, value in (knobs or {}).items():
+            knob = Knob(knobName)
+            knob.setValue(value)
+            self.addKnob(knob)
+
+    def Class(self):
+        return self._class
+
+    def name(self):
+        return self._name
+
+    def fullName(self):
+        if self._parent == "root":
+            return self._name
+        return self._parent.replace("root.", "", 1) + "." + self._name
+
+    def knob(self, name):
+        return self._knobs.get(name)
+
+    def knobs(self):
+        return dict(self._knobs)
+
+    def addKnob(self, knob):
+        self._knobs[knob.name()] = knob
+
+    def removeKnob(self, knob):
+        self._knobs.pop(knob.name(), None)
+
+    def writeKnobs(self, flags=0):
+        return ""
+
+    def __getitem__(self, name):
+        return self._knobs[name]
+
+    # groups (and the root) can be used as context
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        return False
+
+
+class Root(Node):
+    def __init__(self):
+        super(Root, self).__init__("Root", "root")
+
+        for knobName, value in [("format", "HD_1080"), ("name", "untitled.nk")]:
+            knob = Knob(knobName)
+            knob.setValue(value)
+            self.addKnob(knob)
+
+
+preferences = Node("Preferences", "preferences")
+rootNode = Root()
+
+# the nodes 'selectedNodes' returns, last selected first like Nuke does
+selection = []
+
+
+def select(nodes):
+    """
+    Replace the current selection.
+    """
+    selection[:] = list(nodes)
+
+
+def selectedNodes(nodeClass=None):
+    return [node for node in selection if nodeClass in [None, node.Class()]]
+
+
+def selectedNode():
+    if not selection:
+        raise ValueError("no node selected")
+    return selection[0]
+
+
+def toNode(name):
+    if name == "preferences":
+        return preferences
+    if name.startswith("root"):
+        return rootNode
+
+    for node in selection:
+        if node.fullName() == name:
+            return node
+
+    return None
+
+
+def root():
+    return rootNode
+
+
+def defaultNodeColor(nodeClass):
+    return 0x7F7F7FFF
+
+
+# - Undo
+
+
+class Undo(object):
+    def name(self, name):
+        pass
+
+    def begin(self, name=None):
+        pass
+
+    def end(self):
+        pass
+
+    def cancel(self):
+        pass
+
+
+# - Menus
+
+
+class Menu(object):
+    def __init__(self, name=""):
+        self._name = name
+        self.items = {}
+
+    def name(self):
+        return self._name
+
+    def findItem(self, name):
+        if name not in self.items:
+            self.items[name] = Menu(name)
+        return self.items[name]
+
+    def addCommand(self, name, command=None, shortcut=None, *args, **kwargs):
+        self.items[name] = command
+        return self
+
+    def addMenu(self, name, *args, **kwargs):
+        return self.findItem(name)
+
+    def removeItem(self, name):
+        self.items.pop(name, None)
+
+
+menus = {}
+
+
+def menu(name):
+    if name not in menus:
+        menus[name] = Menu(name)
+    return menus[name]
+
+
+# - Interface
+
+
+class ProgressTask(object):
+    def __init__(self, message=""):
+        pass
+
+    def setProgress(self, progress):
+        pass
+
+    def setMessage(self, message):
+        pass
+
+    def isCancelled(self):
+        return False
+
+
+def tprint(*args):
+    output.append(" ".join(str(arg) for arg in args))
+
+
+def message(text):
+    output.append(text)
+
+
+def ask(text):
+    return True
+
+
+def getFilename(*args, **kwargs):
+    if filenames:
+        return filenames.pop(0)
+    return None
+
+
+def getColor(color=0):
+    return color
+
+
+def tcl(*args):
+    return ""
+
+
+def executeInMainThread(function, args=(), kwargs=None):
+    return function(*args, **(kwargs or {}))
+
+
+def install():
+    """
+    Register this module as 'nuke'.
+    """
+
+    sys.modules["nuke"] = sys.modules[__name__]
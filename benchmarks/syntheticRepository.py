@@ -0,0 +1,177 @@
+# ----------------------------------------------------------------------------------------------------------
+# Generator for synthetic hotbox repositories.
+#
+# A repository gets a folder for every class in 'Single', class combinations in 'Multiple', buttons in
+# 'All' and a set of rules, alternating between '_rule.py' and '_rule.json'. Every folder holding buttons
+# gets nested submenus as well. The content is random, but the same for the same seed.
+#
+# usage: python benchmarks/syntheticRepository.py <folder> [classes] [combinations] [rules]
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import random
+
+dividerLine = "#" + "-" * 106
+
+buttonScript = """import nuke
+
+for node in nuke.selectedNodes():
+    node.knob("tile_color").setValue(%s)
+"""
+
+ruleScript = """import nuke
+
+selection = nuke.selectedNodes()
+ret = len(selection) >= %s and any(node.Class().startswith("%s") for node in selection)
+"""
+
+
+def classNames(amount):
+    return ["Class%s" % str(index).zfill(3) for index in range(amount)]
+
+
+def writeButton(path, name, seed):
+    """
+    Write a button file, with a header like the manager writes.
+    """
+
+    header = [
+        dividerLine,
+        "#",
+        "# AUTOMATICALLY GENERATED FILE TO BE USED BY W_HOTBOX",
+        "#",
+    ]
+    header.append("# NAME: %s" % name)
+
+    if seed % 3 == 0:
+        header.append("# COLOR: #%06x" % (seed * 2654435761 % 0xFFFFFF))
+    if seed % 5 == 0:
+        header.append("# TEXTCOLOR: #eeeeee")
+
+    header += ["#", dividerLine, "", ""]
+
+    with open(path, "w") as buttonFile:
+        buttonFile.write("\n".join(header) + buttonScript % seed)
+
+
+def fillFolder(folder, buttons, submenus, depth, randomGenerator):
+    """
+    Fill a folder with buttons and (nested) submenus, numbered the way the manager numbers them.
+    """
+
+    index = 0
+
+    for button in range(buttons):
+        index += 1
+        writeButton(
+            "%s/%s.py" % (folder, str(index).zfill(3)),
+            "Button %s" % index,
+            randomGenerator.randint(0, 1000000),
+        )
+
+    if depth <= 0:
+        return
+
+    for submenu in range(submenus):
+        index += 1
+        submenuFolder = "%s/%s" % (folder, str(index).zfill(3))
+        os.mkdir(submenuFolder)
+
+        with open(submenuFolder + "/_name.json", "w") as nameFile:
+            nameFile.write("Submenu %s" % index)
+
+        fillFolder(submenuFolder, buttons, submenus, depth - 1, randomGenerator)
+
+
+def writeRule(folder, index, classes, randomGenerator):
+    """
+    Write a rule, every other rule being a declarative one.
+    """
+
+    minimum = randomGenerator.randint(0, 2)
+    prefix = randomGenerator.choice(classes)[:-1]
+
+    if index % 2:
+        with open(folder + "/_rule.json", "w") as ruleFile:
+            json.dump(
+                {
+                    "ignoreClasses": 0,
+                    "selection": {"min": minimum},
+                    "classes": randomGenerator.sample(classes, min(len(classes), 5)),
+                },
+                ruleFile,
+                indent=4,
+            )
+
+    else:
+        header = [dividerLine, "#", "# IGNORE CLASSES: 0", "#", dividerLine, "", ""]
+        with open(folder + "/_rule.py", "w") as ruleFile:
+            ruleFile.write("\n".join(header) + ruleScript % (minimum, prefix))
+
+
+def createRepository(
+    location,
+    classes=50,
+    combinations=20,
+    rules=10,
+    buttons=8,
+    submenus=2,
+    depth=2,
+    seed=0,
+):
+    """
+    Create a repository in location. Returns the names of the classes that got a folder in 'Single'.
+    """
+
+    randomGenerator = random.Random(seed)
+
+    location = location.replace("\\", "/").rstrip("/") + "/"
+
+    for section in ["", "Single", "Multiple", "All", "Rules", "Templates"]:
+        if not os.path.isdir(location + section):
+            os.makedirs(location + section)
+
+    allClasses = classNames(classes)
+
+    # - Single
+    for nodeClass in allClasses + ["No Selection"]:
+        folder = location + "Single/" + nodeClass
+        os.mkdir(folder)
+        fillFolder(folder, buttons, submenus, depth, randomGenerator)
+
+    # - Multiple
+    createdCombinations = set()
+    while len(createdCombinations) < min(combinations, 2 ** len(allClasses) - 1):
+        size = randomGenerator.randint(2, min(6, max(2, len(allClasses))))
+        createdCombinations.add(
+            "-".join(sorted(randomGenerator.sample(allClasses, size)))
+        )
+
+    for combination in sorted(createdCombinations):
+        folder = location + "Multiple/" + combination
+        os.mkdir(folder)
+        fillFolder(folder, buttons, 0, 0, randomGenerator)
+
+    # - All
+    fillFolder(location + "All", buttons * 2, submenus, depth, randomGenerator)
+
+    # - Rules
+    for index in range(rules):
+        folder = location + "Rules/Rule%s" % str(index).zfill(3)
+        os.mkdir(folder)
+        writeRule(folder, index, allClasses, randomGenerator)
+        fillFolder(folder, buttons, 0, 0, randomGenerator)
+
+    return allClasses
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(
+            "usage: python syntheticRepository.py <folder> [classes] [combinations] [rules]"
+        )
+        sys.exit(1)
+
+    createRepository(sys.argv[1], *[int(i) for i in sys.argv[2:]])
@@ -0,0 +1,118 @@
+# ----------------------------------------------------------------------------------------------------------
+# Tests for the declarative rules and the rule engine of W_hotboxRules.
+# ----------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import W_hotboxRules
+
+
+class Node(object):
+    def __init__(self, nodeClass, name):
+        self._class = nodeClass
+        self._name = name
+
+    def Class(self):
+        return self._class
+
+    def name(self):
+        return self._name
+
+    def knob(self, name):
+        return None
+
+
+class Context(object):
+    def __init__(self, nodes):
+        self.selection = nodes
+        self.classes = list(set(node.Class() for node in nodes))
+
+
+def declarativeRule(data):
+    return W_hotboxRules.DeclarativeRule(
+        "/repository/Rules/rule/_rule.json", json.dumps(data)
+    )
+
+
+@pytest.mark.parametrize("match", ["any", "all"])
+@pytest.mark.parametrize(
+    "condition", [{"classes": ["Read"]}, {"name": "^Read"}, {"knobs": {"file": ""}}]
+)
+def test_empty_selection(match, condition):
+    data = dict(condition, match=match)
+    assert declarativeRule(data).evaluate(Context([])) is False
+
+
+@pytest.mark.parametrize("match", ["any", "all"])
+def test_empty_selection_without_conditions(match):
+    assert declarativeRule({"match": match}).evaluate(Context([])) is True
+
+
+def test_match_classes():
+    nodes = [Node("Read", "Read1"), Node("Blur", "Blur1")]
+
+    assert declarativeRule({"match": "any", "classes": ["Read"]}).evaluate(
+        Context(nodes)
+    )
+    assert not declarativeRule({"match": "all", "classes": ["Read"]}).evaluate(
+        Context(nodes)
+    )
+    assert declarativeRule({"match": "all", "classes": ["Read"]}).evaluate(
+        Context(nodes[:1])
+    )
+
+
+@pytest.mark.parametrize("classes", ["Read", {"Read": 1}])
+def test_classes_must_be_a_list(classes):
+    rule = declarativeRule({"classes": classes})
+
+    assert rule.error == "RuleError: 'classes' should be a list of node classes"
+    assert rule.classes is None
+
+
+def compiledRule(content):
+    return W_hotboxRules.CompiledRule("/repository/Rules/rule/_rule.py", content)
+
+
+def test_depends_in_header():
+    rule = compiledRule(
+        "#---\n# DEPENDS: selection-classes, root-knob:format\n#---\n\nret = True\n"
+    )
+
+    assert rule.error is None
+    assert rule.depends == ("selection-classes", "root-knob:format")
+
+
+def test_depends_outside_header():
+    rule = compiledRule("#---\n#---\n\n# DEPENDS: selection\nret = True\n")
+
+    assert rule.error is None
+    assert rule.depends is None
+
+
+class Loader(object):
+    def __init__(self, rules):
+        self.rules = rules
+
+    def getRule(self, ruleFile):
+        return self.rules.get(ruleFile)
+
+
+def test_disabled_rules_are_skipped():
+    ruleFiles = ["/repository/Rules/%s/_rule.json" % name for name in ["a", "b"]]
+
+    engine = W_hotboxRules.RuleEngine()
+    engine.loader = Loader(dict((path, declarativeRule({})) for path in ruleFiles))
+    engine.disabled.add(ruleFiles[0])
+
+    rules = [(os.path.dirname(path), path) for path in ruleFiles]
+    assert engine.evaluate(rules, Context([])) == (
+        [os.path.dirname(ruleFiles[1])],
+        False,
+    )